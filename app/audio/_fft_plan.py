@@ -0,0 +1,151 @@
+"""
+FFTW-backed short-time Fourier transform with cached plans
+"""
+import os
+import json
+import base64
+import logging
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy import signal
+
+try:
+    import pyfftw
+    PYFFTW_AVAILABLE = True
+except ImportError:
+    PYFFTW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Wisdom is a tuple of bytes, stored as base64 strings in JSON so loading
+# it never executes anything from the models directory
+WISDOM_PATH = "./models/fftw_wisdom.json"
+
+
+def load_wisdom(path: str = WISDOM_PATH) -> bool:
+    """Import FFTW wisdom saved by a previous run"""
+    if not PYFFTW_AVAILABLE or not os.path.exists(path):
+        return False
+
+    try:
+        with open(path, 'r') as f:
+            wisdom = tuple(base64.b64decode(entry) for entry in json.load(f))
+        pyfftw.import_wisdom(wisdom)
+        logger.debug(f"Loaded FFTW wisdom from {path}")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to load FFTW wisdom: {e}")
+        return False
+
+
+def save_wisdom(path: str = WISDOM_PATH) -> bool:
+    """Export accumulated FFTW wisdom so later runs skip planning"""
+    if not PYFFTW_AVAILABLE:
+        return False
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        wisdom = [base64.b64encode(entry).decode('ascii') for entry in pyfftw.export_wisdom()]
+        with open(path, 'w') as f:
+            json.dump(wisdom, f)
+        logger.debug(f"Saved FFTW wisdom to {path}")
+        return True
+    except Exception as e:
+        logger.warning(f"Failed to save FFTW wisdom: {e}")
+        return False
+
+
+class FFTWShortTimeFFT:
+    """
+    Hann-windowed STFT/ISTFT over fixed-size frames using reusable FFTW plans
+
+    Implements the subset of scipy.signal.ShortTimeFFT used by the audio
+    pipeline: ``stft(x)`` returns a ``(bins, frames)`` spectrum with
+    magnitude scaling and ``istft(Zxx, k1=len(x))`` inverts it by
+    weighted overlap-add. One batched forward/inverse plan pair is kept per
+    frame count, and chunk sizes are fixed in the pipeline, so steady-state
+    calls never re-plan.
+    """
+
+    def __init__(self, nperseg: int = 256, hop: int = 128):
+        self.nperseg = nperseg
+        self.hop = hop
+        self.pad = nperseg - hop
+        self.window = signal.get_window("hann", nperseg).astype(np.float32)
+        self.scale = 1.0 / float(self.window.sum())
+        self._plans: Dict[int, Tuple["pyfftw.FFTW", "pyfftw.FFTW", np.ndarray]] = {}
+
+    def _num_frames(self, n: int) -> int:
+        """Number of frames needed to fully overlap n samples"""
+        return (self.pad + n - 1) // self.hop + 1
+
+    def _get_plans(self, num_frames: int) -> Tuple["pyfftw.FFTW", "pyfftw.FFTW", np.ndarray]:
+        """Get (forward, inverse, window envelope) for a frame count"""
+        plans = self._plans.get(num_frames)
+        if plans is None:
+            frames = pyfftw.empty_aligned((num_frames, self.nperseg), dtype='float32')
+            spectrum = pyfftw.empty_aligned(
+                (num_frames, self.nperseg // 2 + 1), dtype='complex64'
+            )
+            forward = pyfftw.FFTW(
+                frames, spectrum, axes=(-1,),
+                flags=('FFTW_MEASURE', 'FFTW_DESTROY_INPUT')
+            )
+            inverse = pyfftw.FFTW(
+                spectrum, frames, axes=(-1,), direction='FFTW_BACKWARD',
+                flags=('FFTW_MEASURE', 'FFTW_DESTROY_INPUT')
+            )
+
+            # Overlap-added squared window, used to normalize the ISTFT
+            envelope = np.zeros((num_frames - 1) * self.hop + self.nperseg, dtype=np.float32)
+            window_sq = self.window ** 2
+            for i in range(num_frames):
+                envelope[i * self.hop:i * self.hop + self.nperseg] += window_sq
+            np.maximum(envelope, 1e-8, out=envelope)
+
+            plans = self._plans[num_frames] = (forward, inverse, envelope)
+        return plans
+
+    def stft(self, x: np.ndarray) -> np.ndarray:
+        """Short-time Fourier transform of a 1-D signal"""
+        n = len(x)
+        num_frames = self._num_frames(n)
+        forward, _, envelope = self._get_plans(num_frames)
+
+        # Zero-pad both ends so every sample is covered by a full set of frames
+        padded = np.zeros(len(envelope), dtype=np.float32)
+        padded[self.pad:self.pad + n] = x
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.nperseg)[::self.hop]
+        np.multiply(frames, self.window, out=forward.input_array)
+
+        forward()
+        return (forward.output_array * self.scale).T
+
+    def istft(self, Zxx: np.ndarray, k1: int) -> np.ndarray:
+        """Inverse STFT, returning the first k1 samples of the signal"""
+        num_frames = Zxx.shape[1]
+        _, inverse, envelope = self._get_plans(num_frames)
+
+        np.multiply(Zxx.T, 1.0 / self.scale, out=inverse.input_array)
+        inverse()
+
+        # Weighted overlap-add
+        frames = inverse.output_array
+        frames *= self.window
+        output = np.zeros(len(envelope), dtype=np.float32)
+        for i in range(num_frames):
+            output[i * self.hop:i * self.hop + self.nperseg] += frames[i]
+        output /= envelope
+
+        return output[self.pad:self.pad + k1]
+
+
+def create_stft(nperseg: int = 256, hop: int = 128, fs: int = 16000):
+    """Create an STFT engine, preferring FFTW plans when pyFFTW is installed"""
+    if PYFFTW_AVAILABLE:
+        return FFTWShortTimeFFT(nperseg, hop)
+
+    return signal.ShortTimeFFT(
+        signal.get_window("hann", nperseg), hop=hop, fs=fs, scale_to="magnitude"
+    )
@@ -0,0 +1,68 @@
+"""
+Numba-compiled NLMS kernel for echo cancellation
+"""
+import numpy as np
+from numba import njit, types
+
+
+@njit(
+    types.Tuple((types.float32[::1], types.int64, types.float64))(
+        types.float32[::1],
+        types.float32[::1],
+        types.float32[::1],
+        types.float32[::1],
+        types.float32,
+        types.int64,
+        types.float64,
+    ),
+    fastmath=True,
+    cache=True,
+)
+def nlms_run(x, r, w, buf, mu, head, norm):
+    """
+    Run the NLMS filter over a block of samples
+
+    The reference history lives in a mirrored ring buffer of length ``2 * L``:
+    each sample is written at ``head`` and ``head + L``, so the newest-first
+    window is always the contiguous slice ``buf[head:head + L]`` and no
+    per-sample shifting is needed. ``norm`` is the window energy, updated
+    recursively as samples enter and leave. ``w`` and ``buf`` are updated in
+    place.
+
+    Returns:
+        Tuple of (error signal, new head index, new window energy)
+    """
+    L = w.shape[0]
+    n = x.shape[0]
+    m = r.shape[0]
+    out = np.empty(n, dtype=np.float32)
+
+    for i in range(n):
+        # Step the ring back; past the end of the reference the oldest
+        # sample is left in place, matching the wrap-around of np.roll
+        head -= 1
+        if head < 0:
+            head += L
+        if i < m:
+            old = buf[head]
+            new = r[i]
+            buf[head] = new
+            buf[head + L] = new
+            norm += new * new - old * old
+            if norm < 0.0:
+                norm = 0.0
+
+        # Predict echo
+        echo = 0.0
+        for k in range(L):
+            echo += w[k] * buf[head + k]
+
+        error = x[i] - echo
+        out[i] = error
+
+        # Update weights
+        scale = mu * error / (norm + 1e-6)
+        for k in range(L):
+            w[k] += scale * buf[head + k]
+
+    return out, head, norm
@@ -0,0 +1,152 @@
+"""
+Micro-batching of concurrent Whisper transcriptions
+"""
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Callable, List, Optional, Tuple
+
+import ctranslate2
+import numpy as np
+from faster_whisper import WhisperModel
+from faster_whisper.tokenizer import Tokenizer
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SAMPLES = 16000 * 30  # One Whisper window
+MAX_DECODE_LENGTH = 448
+
+
+class TranscriptionBatcher:
+    """
+    Collect concurrent transcription requests and run them as one batch
+
+    A single worker drains the queue: whatever arrives while a batch is
+    running forms the next batch, so a lone request is dispatched at once and
+    only concurrent ones are grouped. ``process_batch`` runs on ``executor``
+    and must return one transcript per input.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[np.ndarray]], List[str]],
+        executor: Executor,
+        max_batch_size: int = 8
+    ):
+        self.process_batch = process_batch
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def submit(self, audio: np.ndarray) -> str:
+        """Queue float32 audio and wait for its transcript"""
+        # (Re)start the worker on the running loop; the batcher is shared
+        # process-wide and may outlive the loop it was first used on
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((audio, future))
+        return await future
+
+    async def _run(self):
+        """Drain the queue in batches until cancelled"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch: List[Tuple[np.ndarray, asyncio.Future]] = [await self._queue.get()]
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Requests whose caller has gone away are dropped
+            batch = [(audio, future) for audio, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            try:
+                texts = await loop.run_in_executor(
+                    self.executor, self.process_batch, [audio for audio, _ in batch]
+                )
+                for (_, future), text in zip(batch, texts):
+                    if not future.done():
+                        future.set_result(text)
+            except Exception as e:
+                logger.error(f"Batched transcription error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def close(self):
+        """Stop the worker task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+def transcribe_batch(
+    model: WhisperModel,
+    audios: List[np.ndarray],
+    no_speech_threshold: float = 0.6
+) -> List[str]:
+    """
+    Greedy-decode several clips of up to 30s in one encoder/decoder call
+
+    Each clip's log-mel features are padded to a full Whisper window and the
+    batch is encoded and decoded together by CTranslate2. Timestamps and the
+    VAD filter are not used; clips the model scores as no-speech return "".
+
+    Args:
+        model: Loaded faster-whisper model
+        audios: 16kHz float32 clips, each at most MAX_BATCH_SAMPLES long
+        no_speech_threshold: No-speech probability above which a clip is dropped
+
+    Returns:
+        One transcript per clip
+    """
+    extractor = model.feature_extractor
+    features = None
+
+    for i, audio in enumerate(audios):
+        # Keep only frames covering the clip, then pad to the window length
+        mel = extractor(audio)[:, :len(audio) // extractor.hop_length]
+        if features is None:
+            features = np.zeros((len(audios), mel.shape[0], extractor.nb_max_frames), dtype=np.float32)
+        features[i, :, :mel.shape[1]] = mel[:, :extractor.nb_max_frames]
+
+    tokenizer = Tokenizer(
+        model.hf_tokenizer,
+        model.model.is_multilingual,
+        task="transcribe",
+        language="en"
+    )
+    prompt = list(tokenizer.sot_sequence) + [tokenizer.no_timestamps]
+
+    encoder_output = model.model.encode(ctranslate2.StorageView.from_array(features))
+    results = model.model.generate(
+        encoder_output,
+        [prompt] * len(audios),
+        beam_size=1,
+        max_length=MAX_DECODE_LENGTH,
+        return_no_speech_prob=True,
+        suppress_blank=True,
+        suppress_tokens=[-1]
+    )
+
+    texts = []
+    for result in results:
+        if result.no_speech_prob > no_speech_threshold:
+            texts.append("")
+            continue
+        tokens = [t for t in result.sequences_ids[0] if t < tokenizer.eot]
+        texts.append(tokenizer.decode(tokens).strip())
+
+    return texts
@@ -2,10 +2,17 @@
 Echo cancellation for removing audio feedback
 """
 import numpy as np
-from scipy import signal
 from typing import Optional
 import logging
 
+from app.audio._fft_plan import create_stft
+
+try:
+    from app.audio._nlms_numba import nlms_run
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 class EchoCanceller:
@@ -14,10 +21,21 @@ class EchoCanceller:
     def __init__(self, filter_length: int = 256, mu: float = 0.1):
         self.filter_length = filter_length
         self.mu = mu  # Learning rate
-        self.weights = np.zeros(filter_length)
-        self.reference_buffer = np.zeros(filter_length)
+        self.weights = np.zeros(filter_length, dtype=np.float32)
+        # Mirrored ring buffer: the newest-first window is buffer[head:head + L]
+        self.reference_buffer = np.zeros(2 * filter_length, dtype=np.float32)
+        self._head = 0
+        self._norm = 0.0  # Energy of the current reference window
         self.error_threshold = 0.01
         
+        # Reusable STFT plan and magnitude scratch for spectral subtraction
+        self._stft = create_stft(256, 128, fs=16000)
+        self._magnitude: Optional[np.ndarray] = None
+        
+        # Running per-bin median of the residual spectrum, tracked across calls
+        self._noise_est: Optional[np.ndarray] = None
+        self._noise_step = 0.1
+        
     def process(self, audio: np.ndarray, reference: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Cancel echo from audio signal
@@ -32,66 +50,149 @@ class EchoCanceller:
         try:
             # Convert to float for processing
             audio_float = audio.astype(np.float32) / 32768.0
-            
+            ref_float = None
             if reference is not None:
                 ref_float = reference.astype(np.float32) / 32768.0
-                return self._nlms_filter(audio_float, ref_float)
-            else:
-                # Simple spectral subtraction if no reference
-                return self._spectral_subtraction(audio_float)
+                
+            cleaned = self._cancel(audio_float, ref_float)
+            
+            # Convert back to int16
+            return (cleaned * 32768.0).astype(np.int16)
                 
         except Exception as e:
             logger.error(f"Echo cancellation error: {e}")
             return audio
+            
+    def process_float(self, audio: np.ndarray, reference: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cancel echo from float32 audio in [-1, 1) without int16 round-trips
+        
+        Args:
+            audio: Input audio with potential echo
+            reference: Reference signal (speaker output), same scale
+            
+        Returns:
+            Float32 audio with echo removed
+        """
+        try:
+            return self._cancel(audio, reference)
+        except Exception as e:
+            logger.error(f"Echo cancellation error: {e}")
+            return audio
+            
+    def _cancel(self, audio: np.ndarray, reference: Optional[np.ndarray]) -> np.ndarray:
+        """Dispatch to NLMS or spectral subtraction on float32 audio"""
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        
+        if reference is not None:
+            reference = np.ascontiguousarray(reference, dtype=np.float32)
+            return self._nlms_filter(audio, reference)
+        else:
+            # Simple spectral subtraction if no reference
+            return self._spectral_subtraction(audio)
     
     def _nlms_filter(self, audio: np.ndarray, reference: np.ndarray) -> np.ndarray:
         """Normalized Least Mean Squares adaptive filter"""
+        if NUMBA_AVAILABLE:
+            output, self._head, self._norm = nlms_run(
+                audio, reference, self.weights, self.reference_buffer,
+                np.float32(self.mu), self._head, self._norm
+            )
+        else:
+            output = self._nlms_filter_numpy(audio, reference)
+            
+        return output
+        
+    def _nlms_filter_numpy(self, audio: np.ndarray, reference: np.ndarray) -> np.ndarray:
+        """Pure NumPy NLMS loop, used when Numba is not installed"""
         output = np.zeros_like(audio)
+        length = self.filter_length
+        buffer = self.reference_buffer
         
         for i in range(len(audio)):
-            # Update reference buffer
-            self.reference_buffer = np.roll(self.reference_buffer, 1)
+            # Step ring buffer back and write the new sample to both halves
+            self._head = (self._head - 1) % length
             if i < len(reference):
-                self.reference_buffer[0] = reference[i]
+                # Recursively update the window energy with the sample
+                # entering and the one leaving
+                old = float(buffer[self._head])
+                new = float(reference[i])
+                buffer[self._head] = buffer[self._head + length] = new
+                self._norm = max(self._norm + new * new - old * old, 0.0)
+            window = buffer[self._head:self._head + length]
             
             # Predict echo
-            echo_estimate = np.dot(self.weights, self.reference_buffer)
+            echo_estimate = np.dot(self.weights, window)
             
             # Calculate error
             error = audio[i] - echo_estimate
             output[i] = error
             
             # Update weights (NLMS algorithm)
-            norm = np.dot(self.reference_buffer, self.reference_buffer) + 1e-6
-            self.weights += self.mu * error * self.reference_buffer / norm
+            norm = self._norm + 1e-6
+            self.weights += (self.mu * error / norm) * window
             
-        # Convert back to int16
-        return (output * 32768.0).astype(np.int16)
+        return output
         
     def _spectral_subtraction(self, audio: np.ndarray) -> np.ndarray:
         """Simple spectral subtraction for echo reduction"""
         # Compute STFT
-        f, t, Zxx = signal.stft(audio, nperseg=256)
+        Zxx = self._stft.stft(audio)
+        magnitude = self._get_magnitude(Zxx)
         
-        # Estimate noise spectrum (simple approach)
-        noise_spectrum = np.median(np.abs(Zxx), axis=1, keepdims=True)
+        # Estimate noise spectrum
+        noise_spectrum = self._update_noise_estimate(magnitude)
         
-        # Subtract noise spectrum
-        cleaned_spectrum = np.abs(Zxx) - noise_spectrum
-        cleaned_spectrum = np.maximum(cleaned_spectrum, 0)
-        
-        # Preserve phase
-        phase = np.angle(Zxx)
-        cleaned_complex = cleaned_spectrum * np.exp(1j * phase)
+        # Subtract noise spectrum by scaling each bin with
+        # max(|Z| - noise, 0) / |Z|, which leaves the phase of Zxx untouched
+        np.maximum(magnitude, 1e-12, out=magnitude)
+        np.divide(noise_spectrum, magnitude, out=magnitude)
+        np.subtract(1.0, magnitude, out=magnitude)
+        np.maximum(magnitude, 0, out=magnitude)
+        Zxx *= magnitude
         
         # Inverse STFT
-        _, cleaned_audio = signal.istft(cleaned_complex, nperseg=256)
+        return self._stft.istft(Zxx, k1=len(audio))
+        
+    def _update_noise_estimate(self, magnitude: np.ndarray) -> np.ndarray:
+        """
+        Track the per-bin median magnitude across calls
+        
+        The estimate is seeded from the first call's median. After that each
+        bin is nudged up or down by the fraction of frames above or below it
+        (stochastic quantile tracking), which is linear in the number of
+        frames instead of sorting the time axis on every call.
+        
+        The step is additive and scaled by the larger of the estimate and the
+        bin's mean magnitude, so bins seeded at zero (e.g. a silent first
+        chunk) can still grow once signal arrives.
+        
+        Returns:
+            Noise spectrum of shape (bins, 1)
+        """
+        if self._noise_est is None or self._noise_est.shape[0] != magnitude.shape[0]:
+            self._noise_est = np.median(magnitude, axis=1, keepdims=True)
+            return self._noise_est
+            
+        above = np.count_nonzero(magnitude > self._noise_est, axis=1).reshape(-1, 1)
+        balance = (2.0 * above - magnitude.shape[1]) / magnitude.shape[1]
+        scale = np.maximum(self._noise_est, magnitude.mean(axis=1, keepdims=True))
+        self._noise_est += self._noise_step * balance * scale
+        np.maximum(self._noise_est, 0, out=self._noise_est)
+        
+        return self._noise_est
         
-        # Convert back to int16
-        return (cleaned_audio * 32768.0).astype(np.int16)
+    def _get_magnitude(self, Zxx: np.ndarray) -> np.ndarray:
+        """Compute |Zxx| into a scratch buffer reused across frames"""
+        if self._magnitude is None or self._magnitude.shape != Zxx.shape:
+            self._magnitude = np.empty(Zxx.shape, dtype=Zxx.real.dtype)
+        return np.abs(Zxx, out=self._magnitude)
         
     def reset(self):
         """Reset the adaptive filter"""
-        self.weights = np.zeros(self.filter_length)
-        self.reference_buffer = np.zeros(self.filter_length)
+        self.weights = np.zeros(self.filter_length, dtype=np.float32)
+        self.reference_buffer = np.zeros(2 * self.filter_length, dtype=np.float32)
+        self._head = 0
+        self._norm = 0.0
+        self._noise_est = None
         logger.debug("Echo canceller reset")
@@ -2,22 +2,44 @@
 Noise reduction for improving audio quality
 """
 import numpy as np
-from scipy import signal
-import noisereduce as nr
+from scipy import ndimage
+from typing import Optional
 import logging
 
+from app.audio._fft_plan import create_stft
+
 logger = logging.getLogger(__name__)
 
 class NoiseReducer:
-    """Advanced noise reduction using spectral subtraction and filtering"""
+    """Streaming noise reduction using stationary spectral gating"""
     
     def __init__(self, reduction_db: float = 20.0):
         self.reduction_db = reduction_db
         self.sample_rate = 16000
-        self.noise_profile = None
+        self.noise_profile = None  # Per-bin mean noise magnitude
+        self.noise_std = None  # Per-bin noise magnitude deviation
         self.frame_count = 0
         self.calibration_frames = 20  # Frames to collect for noise profile
         
+        # Stationary gating parameters (same defaults as noisereduce)
+        self.n_std_thresh = 1.5
+        self.prop_decrease = reduction_db / 100.0
+        self._smoothing_kernel = np.outer([0.5, 1.0, 0.5], [0.5, 1.0, 0.5])
+        self._smoothing_kernel /= self._smoothing_kernel.sum()
+        
+        # Running per-bin sums over calibration frames
+        self._noise_count = 0
+        self._noise_sum: Optional[np.ndarray] = None
+        self._noise_sq_sum: Optional[np.ndarray] = None
+        
+        # Reusable STFT plan and magnitude scratch for spectral gating
+        self._stft = create_stft(256, 128, fs=self.sample_rate)
+        self._magnitude: Optional[np.ndarray] = None
+        
+        # Per-instance RNG and scratch buffer for comfort noise
+        self._rng = np.random.default_rng()
+        self._comfort_scratch: Optional[np.ndarray] = None
+        
     def process(self, audio: np.ndarray) -> np.ndarray:
         """
         Reduce noise in audio signal
@@ -32,16 +54,7 @@ class NoiseReducer:
             # Convert to float for processing
             audio_float = audio.astype(np.float32) / 32768.0
             
-            # Calibrate noise profile if needed
-            if self.frame_count < self.calibration_frames:
-                self._update_noise_profile(audio_float)
-                self.frame_count += 1
-                
-            # Apply noise reduction
-            reduced = self._reduce_noise(audio_float)
-            
-            # Apply comfort noise
-            reduced = self._add_comfort_noise(reduced)
+            reduced = self._reduce(audio_float)
             
             # Convert back to int16
             return (reduced * 32768.0).astype(np.int16)
@@ -49,45 +62,103 @@ class NoiseReducer:
         except Exception as e:
             logger.error(f"Noise reduction error: {e}")
             return audio
+            
+    def process_float(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Reduce noise in float32 audio in [-1, 1) without int16 round-trips
+        
+        Args:
+            audio: Input audio with noise
+            
+        Returns:
+            Float32 audio with reduced noise
+        """
+        try:
+            return self._reduce(audio)
+        except Exception as e:
+            logger.error(f"Noise reduction error: {e}")
+            return audio
+            
+    def _reduce(self, audio: np.ndarray) -> np.ndarray:
+        """Calibrate, reduce noise and add comfort noise on float audio"""
+        # Calibrate noise profile if needed
+        if self.frame_count < self.calibration_frames:
+            self._update_noise_profile(audio)
+            self.frame_count += 1
+            
+        # Apply noise reduction
+        reduced = self._reduce_noise(audio)
+        
+        # Apply comfort noise
+        self._add_comfort_noise(reduced)
+        
+        return reduced
     
     def _update_noise_profile(self, audio: np.ndarray):
-        """Update noise profile from background audio"""
+        """Update per-bin noise statistics from background audio"""
         # Compute spectrum
-        f, t, Zxx = signal.stft(audio, nperseg=256)
-        spectrum = np.abs(Zxx)
+        spectrum = self._get_magnitude(self._stft.stft(audio))
         
-        if self.noise_profile is None:
-            self.noise_profile = spectrum
-        else:
-            # Exponential moving average
-            alpha = 0.1
-            self.noise_profile = alpha * spectrum + (1 - alpha) * self.noise_profile
+        if self._noise_sum is None:
+            self._noise_sum = np.zeros((spectrum.shape[0], 1))
+            self._noise_sq_sum = np.zeros((spectrum.shape[0], 1))
+            
+        # Accumulate over every STFT frame seen during calibration
+        self._noise_count += spectrum.shape[1]
+        self._noise_sum += spectrum.sum(axis=1, keepdims=True)
+        self._noise_sq_sum += np.square(spectrum).sum(axis=1, keepdims=True)
+        
+        self.noise_profile = self._noise_sum / self._noise_count
+        variance = self._noise_sq_sum / self._noise_count - np.square(self.noise_profile)
+        self.noise_std = np.sqrt(np.maximum(variance, 0))
             
     def _reduce_noise(self, audio: np.ndarray) -> np.ndarray:
         """Apply noise reduction algorithm"""
         try:
-            # Use noisereduce library for sophisticated reduction
-            reduced = nr.reduce_noise(
-                y=audio,
-                sr=self.sample_rate,
-                stationary=True,
-                prop_decrease=self.reduction_db / 100.0
-            )
-            
-            return reduced
+            if self.noise_profile is not None:
+                return self._apply_mask(audio)
+        except Exception as e:
+            logger.debug(f"Spectral mask failed, using gate: {e}")
             
-        except:
-            # Fallback to simple spectral subtraction
-            return self._spectral_gate(audio)
+        # Fallback to simple spectral gating
+        return self._spectral_gate(audio)
+        
+    def _apply_mask(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Stationary spectral gating against the calibrated noise statistics
+        
+        Bins well above ``mean + n_std_thresh * std`` of the noise pass
+        unchanged, bins below are attenuated by ``prop_decrease``, with a
+        sigmoid transition and a 3x3 time-frequency smoothing of the mask.
+        """
+        Zxx = self._stft.stft(audio)
+        
+        # Build the soft mask in the magnitude scratch buffer
+        mask = self._get_magnitude(Zxx)
+        softness = self.noise_std + 1e-10
+        mask -= self.noise_profile + self.n_std_thresh * self.noise_std
+        mask /= softness
+        np.negative(mask, out=mask)
+        np.clip(mask, -50, 50, out=mask)
+        np.exp(mask, out=mask)
+        mask += 1
+        np.reciprocal(mask, out=mask)
+        
+        # Attenuate by prop_decrease where the mask is off
+        mask *= self.prop_decrease
+        mask += 1 - self.prop_decrease
+        gain = ndimage.convolve(mask, self._smoothing_kernel, mode='nearest')
+        
+        Zxx *= gain
+        return self._stft.istft(Zxx, k1=len(audio))
             
     def _spectral_gate(self, audio: np.ndarray) -> np.ndarray:
         """Simple spectral gating for noise reduction"""
         # Compute STFT
-        f, t, Zxx = signal.stft(audio, nperseg=256)
+        Zxx = self._stft.stft(audio)
         
         # Apply spectral gate
-        magnitude = np.abs(Zxx)
-        phase = np.angle(Zxx)
+        magnitude = self._get_magnitude(Zxx)
         
         # Calculate threshold
         if self.noise_profile is not None:
@@ -95,25 +166,39 @@ class NoiseReducer:
         else:
             threshold = np.percentile(magnitude, 20)
             
-        # Gate frequencies below threshold
-        magnitude[magnitude < threshold] *= 0.1
+        # Gate frequencies below threshold; scaling Zxx directly keeps phase
+        Zxx[magnitude < threshold] *= 0.1
         
         # Reconstruct signal
-        Zxx_cleaned = magnitude * np.exp(1j * phase)
-        _, cleaned_audio = signal.istft(Zxx_cleaned, nperseg=256)
+        cleaned_audio = self._stft.istft(Zxx, k1=len(audio))
         
         return cleaned_audio
         
-    def _add_comfort_noise(self, audio: np.ndarray) -> np.ndarray:
-        """Add slight comfort noise to avoid unnatural silence"""
+    def _get_magnitude(self, Zxx: np.ndarray) -> np.ndarray:
+        """Compute |Zxx| into a scratch buffer reused across frames"""
+        if self._magnitude is None or self._magnitude.shape != Zxx.shape:
+            self._magnitude = np.empty(Zxx.shape, dtype=Zxx.real.dtype)
+        return np.abs(Zxx, out=self._magnitude)
+        
+    def _add_comfort_noise(self, audio: np.ndarray):
+        """Add slight comfort noise in place to avoid unnatural silence"""
+        scratch = self._comfort_scratch
+        if scratch is None or scratch.shape != audio.shape or scratch.dtype != audio.dtype:
+            scratch = self._comfort_scratch = np.empty(audio.shape, dtype=audio.dtype)
+            
         # Generate very quiet white noise
-        comfort_noise = np.random.normal(0, 0.0001, len(audio))
+        self._rng.standard_normal(dtype=scratch.dtype, out=scratch)
+        scratch *= 0.0001
         
         # Mix with processed audio
-        return audio + comfort_noise
+        audio += scratch
         
     def reset(self):
         """Reset noise profile"""
         self.noise_profile = None
+        self.noise_std = None
         self.frame_count = 0
+        self._noise_count = 0
+        self._noise_sum = None
+        self._noise_sq_sum = None
         logger.debug("Noise reducer reset")
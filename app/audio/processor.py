@@ -15,7 +15,9 @@ from app.audio.echo_cancellation import EchoCanceller
 from app.audio.noise_reduction import NoiseReducer
 from app.llm.response_generator import ResponseGenerator
 from app.conversation.turn_manager import TurnManager
-from app.utils.audio_utils import mulaw_decode, mulaw_encode, resample_audio
+from app.utils.audio_utils import (
+    mulaw_decode_to_float32, mulaw_encode, resample_audio, float_to_int16
+)
 from app.config import settings
 
 logger = logging.getLogger(__name__)
@@ -35,9 +37,15 @@ class AudioProcessor:
         
         # Audio buffers
         self.audio_buffer = deque(maxlen=50)  # ~1 second of audio at 20ms chunks
-        self.processed_audio = bytearray()
+        self._proc_buf = np.empty(int(16000 * 1.5), dtype=np.int16)  # 16kHz PCM awaiting STT
+        self._proc_len = 0
+        self._decode_scratch = np.empty(0, dtype=np.float32)
         self.output_buffer = deque()
         
+        # Wake the consumers when work arrives instead of polling
+        self._audio_event = asyncio.Event()
+        self._output_event = asyncio.Event()
+        
         # State tracking
         self.is_processing = False
         self.is_speaking = False
@@ -70,11 +78,17 @@ class AudioProcessor:
         """Process incoming audio chunk from Twilio"""
         # Add to buffer for processing
         self.audio_buffer.append((audio_data, timestamp))
+        if len(self.audio_buffer) >= 10:
+            self._audio_event.set()
         
     async def _process_input_audio(self):
         """Process input audio for speech recognition"""
         while self.is_processing:
-            if len(self.audio_buffer) >= 10:  # Process ~200ms chunks
+            # Sleep until ~200ms of audio is queued or the processor stops
+            await self._audio_event.wait()
+            self._audio_event.clear()
+            
+            while self.is_processing and len(self.audio_buffer) >= 10:  # Process ~200ms chunks
                 # Collect audio chunks
                 chunks = []
                 for _ in range(10):
@@ -83,40 +97,53 @@ class AudioProcessor:
                         chunks.append(chunk)
                 
                 if chunks:
-                    # Combine and decode audio
+                    # Combine and decode straight to float32; the chain stays
+                    # in float until the VAD/Whisper boundary
                     combined_audio = b''.join(chunks)
-                    pcm_audio = mulaw_decode(combined_audio)
+                    if len(self._decode_scratch) != len(combined_audio):
+                        self._decode_scratch = np.empty(len(combined_audio), dtype=np.float32)
+                    audio = mulaw_decode_to_float32(combined_audio, out=self._decode_scratch)
                     
                     # Apply audio processing
                     if settings.enable_echo_cancellation:
-                        pcm_audio = self.echo_canceller.process(pcm_audio)
+                        audio = self.echo_canceller.process_float(audio)
                     if settings.enable_noise_reduction:
-                        pcm_audio = self.noise_reducer.process(pcm_audio)
+                        audio = self.noise_reducer.process_float(audio)
                     
                     # Resample for Whisper (8kHz -> 16kHz)
-                    resampled_audio = resample_audio(pcm_audio, 8000, 16000)
+                    resampled_audio = float_to_int16(resample_audio(audio, 8000, 16000))
                     
                     # Check for voice activity
                     if self.vad.is_speech(resampled_audio):
                         self.last_speech_time = time.time()
-                        self.processed_audio.extend(resampled_audio)
+                        self._append_processed(resampled_audio)
                         
                         # Process if we have enough audio
-                        if len(self.processed_audio) >= 16000 * 0.3:  # 300ms
+                        if self._proc_len >= 16000 * 0.3:  # 300ms
                             await self._transcribe_audio()
-                    
-            await asyncio.sleep(0.02)  # 20ms loop
+    
+    def _append_processed(self, audio: np.ndarray):
+        """Append 16kHz PCM to the preallocated transcription buffer"""
+        end = self._proc_len + len(audio)
+        if end > len(self._proc_buf):
+            grown = np.empty(max(end, 2 * len(self._proc_buf)), dtype=np.int16)
+            grown[:self._proc_len] = self._proc_buf[:self._proc_len]
+            self._proc_buf = grown
+            
+        self._proc_buf[self._proc_len:end] = audio
+        self._proc_len = end
     
     async def _transcribe_audio(self):
         """Transcribe accumulated audio"""
-        if not self.processed_audio:
+        if not self._proc_len:
             return
             
-        # Convert to numpy array
-        audio_array = np.frombuffer(self.processed_audio, dtype=np.int16)
+        # Hand Whisper a view of the buffer; nothing is appended until the
+        # transcription below has been awaited
+        audio_array = self._proc_buf[:self._proc_len]
         
         # Clear buffer for next chunk
-        self.processed_audio.clear()
+        self._proc_len = 0
         
         # Transcribe with Whisper
         start_time = time.time()
@@ -142,28 +169,33 @@ class AudioProcessor:
         # Record timing
         self.process_start_time = time.time()
         
-        # Generate response
-        response_text = await self.response_generator.generate(
-            self.current_transcript,
-            self.websocket_handler.call_sid
-        )
-        
         # Clear transcript for next turn
+        transcript = self.current_transcript
         self.current_transcript = ""
         
-        if response_text:
+        # Synthesize each sentence as the LLM finishes it, so playback
+        # starts while the rest of the response is still generating
+        async for sentence in self.response_generator.generate_stream(
+            transcript,
+            self.websocket_handler.call_sid
+        ):
             # Generate TTS audio
-            audio_chunks = await self.tts.synthesize(response_text)
+            audio_chunks = await self.tts.synthesize(sentence)
             
             # Queue audio for output
-            for chunk in audio_chunks:
-                self.output_buffer.append(chunk)
+            self._queue_output(audio_chunks)
                 
             # Record first response time
             if self.first_response_time == 0:
                 self.first_response_time = (time.time() - self.process_start_time) * 1000
                 logger.info(f"First response time: {self.first_response_time:.0f}ms")
     
+    def _queue_output(self, audio_chunks):
+        """Queue TTS chunks and wake the output task"""
+        self.output_buffer.extend(audio_chunks)
+        if self.output_buffer:
+            self._output_event.set()
+    
     async def _process_output_audio(self):
         """Send TTS audio to Twilio"""
         while self.is_processing:
@@ -186,7 +218,10 @@ class AudioProcessor:
                 await asyncio.sleep(0.02)
             else:
                 self.is_speaking = False
-                await asyncio.sleep(0.01)
+                
+                # Sleep until TTS audio is queued or the processor stops
+                self._output_event.clear()
+                await self._output_event.wait()
                 
     async def _monitor_silence(self):
         """Monitor for extended silence and prompt if needed"""
@@ -204,8 +239,7 @@ class AudioProcessor:
                     logger.info("Extended silence detected, prompting user")
                     prompt_text = "Hello? Are you still there?"
                     audio_chunks = await self.tts.synthesize(prompt_text)
-                    for chunk in audio_chunks:
-                        self.output_buffer.append(chunk)
+                    self._queue_output(audio_chunks)
                     self.last_speech_time = current_time  # Reset timer
                     
             await asyncio.sleep(0.5)
@@ -228,4 +262,10 @@ class AudioProcessor:
     async def stop(self):
         """Stop audio processing"""
         self.is_processing = False
+        
+        # Release the consumers blocked on their events
+        self._audio_event.set()
+        self._output_event.set()
+        
+        await self.tts.close()
         logger.info("Audio processor stopped")
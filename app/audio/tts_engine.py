@@ -9,6 +9,7 @@ import io
 import wave
 import subprocess
 import tempfile
+import shutil
 import os
 
 from app.config import settings
@@ -23,6 +24,12 @@ class TTSEngine:
         self.device = settings.tts_device
         self.is_ready = False
         self.piper_path = self._find_piper()
+        self.model_path = f"./models/piper/{self.model_name}.onnx"
+        
+        # Long-lived Piper process, so the voice model is loaded only once
+        self._piper_proc: Optional[asyncio.subprocess.Process] = None
+        self._piper_output_dir: Optional[str] = None
+        self._piper_lock = asyncio.Lock()
         
     def _find_piper(self) -> Optional[str]:
         """Find Piper TTS executable"""
@@ -57,6 +64,9 @@ class TTSEngine:
                 # Download voice model if needed
                 await self._download_voice_model()
                 
+                # Load the voice model up front
+                await self._start_piper()
+                
             self.is_ready = True
             logger.info("TTS engine initialized")
             
@@ -78,6 +88,27 @@ class TTSEngine:
             # For now, we'll assume models are pre-installed
             pass
     
+    async def _start_piper(self):
+        """Launch a persistent Piper process reading one utterance per line"""
+        if self._piper_output_dir is None:
+            self._piper_output_dir = tempfile.mkdtemp(prefix="piper_")
+            
+        # In --output_dir mode Piper writes one WAV per input line and prints
+        # its path, which marks the end of each utterance
+        self._piper_proc = await asyncio.create_subprocess_exec(
+            self.piper_path,
+            "--model", self.model_path,
+            "--output_dir", self._piper_output_dir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+        logger.info("Started persistent Piper process")
+        
+    def _piper_running(self) -> bool:
+        """Check if the persistent Piper process is alive"""
+        return self._piper_proc is not None and self._piper_proc.returncode is None
+    
     async def synthesize(self, text: str) -> List[bytes]:
         """Synthesize text to audio chunks"""
         if not text:
@@ -94,53 +125,109 @@ class TTSEngine:
             return []
             
     async def _synthesize_piper(self, text: str) -> List[bytes]:
-        """Synthesize using Piper TTS"""
+        """Synthesize using the persistent Piper process"""
+        try:
+            async with self._piper_lock:
+                if not self._piper_running():
+                    await self._start_piper()
+                    
+                # Piper treats each line as one utterance
+                line = " ".join(text.split()) + "\n"
+                self._piper_proc.stdin.write(line.encode())
+                await self._piper_proc.stdin.drain()
+                
+                wav_path = await asyncio.wait_for(
+                    self._piper_proc.stdout.readline(),
+                    timeout=settings.response_timeout_ms / 1000
+                )
+                
+            wav_path = wav_path.decode().strip()
+            if not wav_path:
+                raise RuntimeError("Piper process exited")
+                
+            try:
+                return self._read_wav_chunks(wav_path)
+            finally:
+                os.unlink(wav_path)
+                
+        except Exception as e:
+            logger.error(f"Persistent Piper synthesis error: {e}, retrying single-shot")
+            await self.close()
+            return await self._synthesize_piper_once(text)
+            
+    async def _synthesize_piper_once(self, text: str) -> List[bytes]:
+        """Synthesize using a one-off Piper process streaming raw PCM"""
         chunks = []
+        chunk_size = 16000 // 5  # ~200ms chunks at 16kHz
         
         try:
-            # Create temporary file for output
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                tmp_path = tmp_file.name
-                
-            # Run Piper
-            model_path = f"./models/piper/{self.model_name}.onnx"
+            # Run Piper with raw 16-bit PCM on stdout
             cmd = [
                 self.piper_path,
-                "--model", model_path,
-                "--output_file", tmp_path
+                "--model", self.model_path,
+                "--output-raw"
             ]
             
-            # Run synthesis
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.DEVNULL
             )
             
             # Send text to Piper
-            stdout, stderr = await process.communicate(input=text.encode())
+            process.stdin.write(text.encode())
+            await process.stdin.drain()
+            process.stdin.close()
             
-            if process.returncode == 0:
-                # Read and chunk the audio
-                with wave.open(tmp_path, 'rb') as wav_file:
-                    frames = wav_file.readframes(wav_file.getnframes())
+            # Read audio straight off stdout in streaming-sized chunks
+            while True:
+                try:
+                    chunks.append(await process.stdout.readexactly(chunk_size))
+                except asyncio.IncompleteReadError as e:
+                    if e.partial:
+                        chunks.append(e.partial)
+                    break
                     
-                    # Split into chunks for streaming
-                    chunk_size = 16000 // 5  # ~200ms chunks at 16kHz
-                    for i in range(0, len(frames), chunk_size):
-                        chunk = frames[i:i + chunk_size]
-                        chunks.append(chunk)
-            else:
-                logger.error(f"Piper TTS failed: {stderr.decode()}")
+            await process.wait()
+            if process.returncode != 0:
+                logger.error(f"Piper TTS failed with exit code {process.returncode}")
                 
-            # Clean up
-            os.unlink(tmp_path)
-            
         except Exception as e:
             logger.error(f"Piper synthesis error: {e}")
             
         return chunks
+        
+    def _read_wav_chunks(self, path: str) -> List[bytes]:
+        """Read a WAV file and split it into streaming chunks"""
+        chunks = []
+        
+        with wave.open(path, 'rb') as wav_file:
+            frames = wav_file.readframes(wav_file.getnframes())
+            
+            # Split into chunks for streaming
+            chunk_size = 16000 // 5  # ~200ms chunks at 16kHz
+            for i in range(0, len(frames), chunk_size):
+                chunk = frames[i:i + chunk_size]
+                chunks.append(chunk)
+                
+        return chunks
+        
+    async def close(self):
+        """Stop the persistent Piper process"""
+        proc, self._piper_proc = self._piper_proc, None
+        if proc is not None and proc.returncode is None:
+            try:
+                proc.stdin.close()
+                await asyncio.wait_for(proc.wait(), timeout=1.0)
+            except Exception:
+                proc.kill()
+                await proc.wait()
+            logger.debug("Stopped persistent Piper process")
+            
+        if self._piper_output_dir is not None:
+            shutil.rmtree(self._piper_output_dir, ignore_errors=True)
+            self._piper_output_dir = None
     
     async def _synthesize_fallback(self, text: str) -> List[bytes]:
         """Fallback TTS using basic synthesis"""
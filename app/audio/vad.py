@@ -16,8 +16,10 @@ class VoiceActivityDetector:
     def __init__(self):
         self.aggressiveness = settings.vad_aggressiveness
         self.vad = webrtcvad.Vad(self.aggressiveness)
-        self.energy_threshold = 0.01
+        self.energy_threshold = settings.vad_energy_threshold
         self.zcr_threshold = 0.1
+        # Squared int16-scale threshold so the RMS check needs no sqrt
+        self._energy_threshold_sq = (self.energy_threshold * 32768.0) ** 2
         
     def is_speech(self, audio: np.ndarray, sample_rate: int = 16000) -> bool:
         """Detect if audio contains speech"""
@@ -39,18 +41,29 @@ class VoiceActivityDetector:
     
     def _check_energy(self, audio: np.ndarray) -> bool:
         """Check audio energy level"""
-        # Calculate RMS energy
-        energy = np.sqrt(np.mean(audio.astype(np.float32) ** 2))
-        normalized_energy = energy / 32768.0  # Normalize for int16
+        if len(audio) == 0:
+            return False
+            
+        # Compare mean square energy against the squared threshold. np.dot on
+        # int16 would overflow, so take a single float32 copy for BLAS.
+        samples = audio.astype(np.float32)
+        sq_sum = float(np.dot(samples, samples))
         
-        return normalized_energy > self.energy_threshold
+        return sq_sum > self._energy_threshold_sq * len(audio)
         
     def _check_zcr(self, audio: np.ndarray) -> bool:
         """Check zero-crossing rate"""
-        # Calculate zero-crossing rate
-        signs = np.sign(audio)
-        signs[signs == 0] = -1
-        zcr = len(np.where(np.diff(signs))[0]) / len(audio)
+        if len(audio) < 2:
+            return True
+
+        if audio.dtype == np.int16:
+            # Two samples differ in sign iff their XOR has the sign bit set
+            crossings = np.count_nonzero(np.bitwise_xor(audio[1:], audio[:-1]) < 0)
+        else:
+            # Compare sign bits directly; zero counts as non-negative, as above
+            negative = np.signbit(audio)
+            crossings = np.count_nonzero(negative[1:] != negative[:-1])
+        zcr = crossings / len(audio)
         
         return zcr < self.zcr_threshold
         
@@ -71,9 +84,15 @@ class VoiceActivityDetector:
         num_speech_frames = 0
         num_frames = 0
         
-        audio_bytes = audio.astype(np.int16).tobytes()
+        if audio.dtype != np.int16:
+            audio = audio.astype(np.int16)
+            
+        # View the samples as raw bytes; slicing a memoryview does not copy
+        audio_bytes = memoryview(np.ascontiguousarray(audio)).cast('B')
+        
+        offsets = range(0, len(audio_bytes) - frame_size * 2, frame_size * 2)
         
-        for i in range(0, len(audio_bytes) - frame_size * 2, frame_size * 2):
+        for index, i in enumerate(offsets):
             frame = audio_bytes[i:i + frame_size * 2]
             
             try:
@@ -83,6 +102,10 @@ class VoiceActivityDetector:
             except:
                 continue
                 
+            # Stop once the remaining frames cannot change the vote
+            if self._vote_decided(num_speech_frames, num_frames, len(offsets) - index - 1):
+                return num_speech_frames / num_frames > 0.3
+                
         # Consider speech if >30% frames contain speech
         if num_frames > 0:
             speech_ratio = num_speech_frames / num_frames
@@ -90,6 +113,30 @@ class VoiceActivityDetector:
             
         return False
         
+    @staticmethod
+    def _vote_decided(num_speech: int, num_frames: int, remaining: int) -> bool:
+        """
+        Check whether the >30% speech vote is settled regardless of the
+        frames still to be scored
+        
+        Args:
+            num_speech: Speech frames so far
+            num_frames: Frames scored so far
+            remaining: Frames not yet scored
+            
+        Returns:
+            True if the final ratio falls on the same side of 30% whether
+            the remaining frames are all speech or all silence
+        """
+        if remaining == 0:
+            return True
+            
+        current = num_speech / num_frames > 0.3
+        all_speech = (num_speech + remaining) / (num_frames + remaining) > 0.3
+        all_silence = num_speech / (num_frames + remaining) > 0.3
+        
+        return current == all_speech == all_silence
+        
     def set_aggressiveness(self, level: int):
         """Update VAD aggressiveness (0-3)"""
         if 0 <= level <= 3:
@@ -2,26 +2,68 @@
 Optimized Whisper implementation for ultra-low latency STT
 """
 import asyncio
+import hashlib
 import numpy as np
-from typing import Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Union
 import logging
 import time
 from faster_whisper import WhisperModel
 import torch
 
 from app.config import settings
+from app.audio._whisper_batch import TranscriptionBatcher, transcribe_batch, MAX_BATCH_SAMPLES
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Inference threads shared by every call's WhisperTurbo; CTranslate2 releases
+# the GIL, so concurrent calls overlap instead of queueing on the event loop
+_executor: Optional[ThreadPoolExecutor] = None
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared inference thread pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.num_worker_threads,
+            thread_name_prefix="whisper"
+        )
+    return _executor
+
+# One model (and its batcher) per process; every call's WhisperTurbo shares
+# it instead of loading another copy into GPU memory
+_model: Optional[WhisperModel] = None
+_model_device: Optional[str] = None
+_model_compute_type: Optional[str] = None
+_batcher: Optional[TranscriptionBatcher] = None
+_model_lock = asyncio.Lock()
+
 class WhisperTurbo:
     """Optimized Whisper for fast speech-to-text"""
     
     def __init__(self):
-        self.model: Optional[WhisperModel] = None
-        self.device = settings.whisper_device
-        self.compute_type = settings.whisper_compute_type
+        # Picks up the shared model if it is already loaded
+        self.model: Optional[WhisperModel] = _model
+        self.device = _model_device or settings.whisper_device
+        self.compute_type = _model_compute_type or settings.whisper_compute_type
         self.model_size = self._get_model_size()
         
+        # Float32 scratch reused across calls (grown on demand)
+        self._scratch = np.empty(16000 * 30, dtype=np.float32)
+        self._scratch_lock = asyncio.Lock()
+        
+        # Transcripts of short chunks keyed by a hash of their samples
+        self._cache: "OrderedDict[int, str]" = OrderedDict()
+        self._cache_size = 256
+        self._cache_max_samples = 16000 * 2  # Only cache chunks up to 2s
+        
     def _get_model_size(self) -> str:
         """Get appropriate model size based on configuration"""
         model_map = {
@@ -33,7 +75,33 @@ class WhisperTurbo:
         return model_map.get(settings.whisper_model, "tiny")
     
     async def initialize(self):
-        """Initialize the Whisper model"""
+        """Initialize the shared Whisper model, loading it on first use"""
+        global _model, _model_device, _model_compute_type, _batcher
+        
+        async with _model_lock:
+            if _model is None:
+                await self._load_model()
+                _model = self.model
+                _model_device = self.device
+                _model_compute_type = self.compute_type
+                
+                # Groups transcriptions from all calls that arrive while the
+                # model is busy
+                _batcher = TranscriptionBatcher(
+                    self._transcribe_batch,
+                    _get_executor(),
+                    max_batch_size=settings.max_concurrent_calls
+                )
+                
+                # Warm up the model
+                await self._warmup()
+                
+        self.model = _model
+        self.device = _model_device
+        self.compute_type = _model_compute_type
+        
+    async def _load_model(self):
+        """Load the Whisper model"""
         try:
             logger.info(f"Loading Whisper model: {self.model_size} on {self.device}")
             
@@ -42,6 +110,11 @@ class WhisperTurbo:
                 logger.warning("CUDA not available, falling back to CPU")
                 self.device = "cpu"
                 self.compute_type = "int8"
+            elif self.device == "cuda" and self.compute_type == "int8":
+                # Plain int8 on GPU misses the tensor-core kernels; int8
+                # weights with float16 activations are faster and still
+                # use far less memory than float16
+                self.compute_type = "int8_float16"
             
             # Load model with optimizations
             self.model = WhisperModel(
@@ -52,9 +125,6 @@ class WhisperTurbo:
                 download_root="./models"
             )
             
-            # Warm up the model
-            await self._warmup()
-            
             logger.info("Whisper model loaded successfully")
             
         except Exception as e:
@@ -63,15 +133,39 @@ class WhisperTurbo:
             
     async def _warmup(self):
         """Warm up the model for faster first inference"""
-        # Create dummy audio (1 second of silence)
-        dummy_audio = np.zeros(16000, dtype=np.float32)
+        loop = asyncio.get_running_loop()
         
-        # Run inference to warm up
-        await self.transcribe(dummy_audio)
+        # Run a range of clip lengths so CTranslate2 allocates and caches
+        # its workspace buffers before the first real call
+        for seconds in (1, 3, 10, 30):
+            t = np.arange(16000 * seconds, dtype=np.float32) / 16000
+            dummy_audio = 0.5 * np.sin(2 * np.pi * 440 * t)
+            
+            # Straight to the model: the VAD filter would drop a pure tone
+            await loop.run_in_executor(_get_executor(), self._warmup_sync, dummy_audio)
+            
         logger.info("Whisper model warmed up")
+        
+    def _warmup_sync(self, audio: np.ndarray):
+        """Run one unfiltered decode to completion"""
+        segments, _ = self.model.transcribe(
+            audio, language="en", beam_size=1, without_timestamps=True
+        )
+        for _ in segments:
+            pass
     
     async def transcribe(self, audio: Union[np.ndarray, bytes]) -> str:
-        """Transcribe audio to text with minimal latency"""
+        """
+        Transcribe audio to text with minimal latency
+        
+        Args:
+            audio: 16kHz mono int16 PCM (array or raw bytes) or float32 in
+                [-1, 1). Twilio's 8kHz audio is upsampled once per chunk in
+                the processor before it is buffered, so it is not resampled here.
+                
+        Returns:
+            Transcript text, or "" for silence and errors
+        """
         if self.model is None:
             await self.initialize()
             
@@ -82,47 +176,127 @@ class WhisperTurbo:
             if isinstance(audio, bytes):
                 audio = np.frombuffer(audio, dtype=np.int16)
                 
-            # Normalize audio to float32 [-1, 1]
-            audio_float = audio.astype(np.float32) / 32768.0
-            
-            # Run transcription with optimized settings
-            segments, info = self.model.transcribe(
-                audio_float,
-                language="en",
-                task="transcribe",
-                beam_size=1,  # Faster with greedy decoding
-                best_of=1,
-                patience=1.0,
-                length_penalty=1.0,
-                temperature=0.0,
-                compression_ratio_threshold=2.4,
-                condition_on_previous_text=False,  # Faster without context
-                vad_filter=True,  # Use VAD to skip silence
-                vad_parameters=dict(
-                    threshold=0.5,
-                    min_speech_duration_ms=250,
-                    max_speech_duration_s=30,
-                    min_silence_duration_ms=100,
-                    window_size_samples=1024,
-                    speech_pad_ms=100
-                )
-            )
-            
-            # Collect transcription
-            transcript = ""
-            for segment in segments:
-                transcript += segment.text
+            # Hold the scratch buffer until the worker thread is done with it
+            async with self._scratch_lock:
+                # Normalize audio to float32 [-1, 1]
+                audio_float = self._to_float32(audio)
+                
+                # Skip the model entirely for silent or near-silent chunks
+                if self._is_silent(audio_float):
+                    logger.debug(f"Skipping silent chunk of {len(audio_float)/16000:.2f}s")
+                    return ""
+                    
+                # Reuse the transcript of an identical short chunk
+                key = self._cache_key(audio_float)
+                if key is not None and key in self._cache:
+                    self._cache.move_to_end(key)
+                    logger.debug("Whisper cache hit")
+                    return self._cache[key]
+                    
+                # Run blocking inference off the event loop, batched with
+                # any other transcriptions waiting on the model
+                transcript = await _batcher.submit(audio_float)
                 
+            transcript = transcript.strip()
+            if key is not None:
+                self._cache[key] = transcript
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+                    
             # Log timing
             latency = (time.time() - start_time) * 1000
             logger.debug(f"Whisper latency: {latency:.0f}ms for {len(audio)/16000:.2f}s audio")
             
-            return transcript.strip()
+            return transcript
             
         except Exception as e:
             logger.error(f"Transcription error: {e}")
             return ""
             
+    def _transcribe_batch(self, audios: List[np.ndarray]) -> List[str]:
+        """Transcribe queued clips; called on an executor thread"""
+        # A lone clip keeps the full pipeline (VAD filter, long-audio windows)
+        if len(audios) == 1 or any(len(audio) > MAX_BATCH_SAMPLES for audio in audios):
+            return [self._run_sync(audio) for audio in audios]
+            
+        try:
+            return transcribe_batch(self.model, audios)
+        except Exception as e:
+            logger.warning(f"Batched decode failed, transcribing one by one: {e}")
+            return [self._run_sync(audio) for audio in audios]
+            
+    def _run_sync(self, audio_float: np.ndarray) -> str:
+        """Run the model and collect segments; called on an executor thread"""
+        # Run transcription with optimized settings
+        segments, info = self.model.transcribe(
+            audio_float,
+            language="en",
+            task="transcribe",
+            beam_size=1,  # Faster with greedy decoding
+            best_of=1,
+            patience=1.0,
+            length_penalty=1.0,
+            temperature=0.0,
+            compression_ratio_threshold=2.4,
+            condition_on_previous_text=False,  # Faster without context
+            without_timestamps=True,  # Only the text is used; skip timestamp tokens
+            vad_filter=True,  # Use VAD to skip silence
+            vad_parameters=dict(
+                threshold=0.5,
+                min_speech_duration_ms=250,
+                max_speech_duration_s=30,
+                min_silence_duration_ms=100,
+                window_size_samples=1024,
+                speech_pad_ms=100
+            )
+        )
+        
+        # Collect transcription; segments decode lazily, so iterate here
+        transcript = ""
+        for segment in segments:
+            transcript += segment.text
+            
+        return transcript
+        
+    def _to_float32(self, audio: np.ndarray) -> np.ndarray:
+        """
+        Scale int16 PCM to float32 in [-1, 1) in a single pass
+        
+        The result is a view of a scratch buffer that is overwritten on the
+        next call; transcribe holds _scratch_lock while the model reads it.
+        """
+        if audio.dtype.kind == 'f':
+            return audio.astype(np.float32, copy=False)
+            
+        if len(audio) > len(self._scratch):
+            self._scratch = np.empty(len(audio), dtype=np.float32)
+            
+        audio_float = self._scratch[:len(audio)]
+        np.multiply(audio, np.float32(1.0 / 32768.0), out=audio_float, casting='unsafe')
+        
+        return audio_float
+        
+    def _cache_key(self, audio: np.ndarray) -> Optional[int]:
+        """Hash a short chunk for the transcript cache, or None if too long"""
+        if len(audio) > self._cache_max_samples:
+            return None
+            
+        data = memoryview(np.ascontiguousarray(audio)).cast('B')
+        if XXHASH_AVAILABLE:
+            return xxhash.xxh3_64_intdigest(data)
+            
+        digest = hashlib.blake2b(data, digest_size=8).digest()
+        return int.from_bytes(digest, 'little')
+        
+    def _is_silent(self, audio: np.ndarray) -> bool:
+        """Check whether the RMS level is below the VAD energy threshold"""
+        if len(audio) == 0:
+            return True
+            
+        # Mean square against the squared threshold avoids the sqrt
+        sq_sum = float(np.dot(audio, audio))
+        return sq_sum < settings.vad_energy_threshold ** 2 * len(audio)
+        
     def is_ready(self) -> bool:
         """Check if model is loaded and ready"""
         return self.model is not None
@@ -1,8 +1,8 @@
 """
 Configuration management for the Phone AI Agent
 """
-from pydantic_settings import BaseSettings
-from pydantic import Field, validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import Field, field_validator
 from typing import Optional, List
 import os
 from pathlib import Path
@@ -11,55 +11,74 @@ class Settings(BaseSettings):
     """Application settings with validation"""
     
     # Twilio Configuration
-    twilio_account_sid: str = Field(..., env="TWILIO_ACCOUNT_SID")
-    twilio_auth_token: str = Field(..., env="TWILIO_AUTH_TOKEN")
-    twilio_phone_number: str = Field(..., env="TWILIO_PHONE_NUMBER")
-    twilio_api_key: Optional[str] = Field(None, env="TWILIO_API_KEY")
-    twilio_api_secret: Optional[str] = Field(None, env="TWILIO_API_SECRET")
+    twilio_account_sid: str = Field(..., validation_alias="TWILIO_ACCOUNT_SID")
+    twilio_auth_token: str = Field(..., validation_alias="TWILIO_AUTH_TOKEN")
+    twilio_phone_number: str = Field(..., validation_alias="TWILIO_PHONE_NUMBER")
+    twilio_api_key: Optional[str] = Field(None, validation_alias="TWILIO_API_KEY")
+    twilio_api_secret: Optional[str] = Field(None, validation_alias="TWILIO_API_SECRET")
     
     # Server Configuration
-    server_host: str = Field("0.0.0.0", env="SERVER_HOST")
-    server_port: int = Field(8000, env="SERVER_PORT")
-    websocket_path: str = Field("/media-stream", env="WEBSOCKET_PATH")
-    public_url: Optional[str] = Field(None, env="PUBLIC_URL")
+    server_host: str = Field("0.0.0.0", validation_alias="SERVER_HOST")
+    server_port: int = Field(8000, validation_alias="SERVER_PORT")
+    websocket_path: str = Field("/media-stream", validation_alias="WEBSOCKET_PATH")
+    public_url: Optional[str] = Field(None, validation_alias="PUBLIC_URL")
     
     # Ollama Configuration
-    ollama_host: str = Field("http://localhost:11434", env="OLLAMA_HOST")
-    ollama_model: str = Field("llama3.2:latest", env="OLLAMA_MODEL")
-    ollama_temperature: float = Field(0.7, env="OLLAMA_TEMPERATURE")
-    ollama_max_tokens: int = Field(150, env="OLLAMA_MAX_TOKENS")
-    ollama_timeout: int = Field(30, env="OLLAMA_TIMEOUT")
+    ollama_host: str = Field("http://localhost:11434", validation_alias="OLLAMA_HOST")
+    ollama_model: str = Field("llama3.2:latest", validation_alias="OLLAMA_MODEL")
+    ollama_temperature: float = Field(0.7, validation_alias="OLLAMA_TEMPERATURE")
+    ollama_max_tokens: int = Field(150, validation_alias="OLLAMA_MAX_TOKENS")
+    ollama_timeout: int = Field(30, validation_alias="OLLAMA_TIMEOUT")
+    ollama_keep_alive: str = Field("30m", validation_alias="OLLAMA_KEEP_ALIVE")
+    ollama_embedding_model: str = Field("nomic-embed-text", validation_alias="OLLAMA_EMBEDDING_MODEL")
     
     # Audio Configuration
-    whisper_model: str = Field("turbo", env="WHISPER_MODEL")
-    whisper_device: str = Field("cuda", env="WHISPER_DEVICE")
-    whisper_compute_type: str = Field("int8", env="WHISPER_COMPUTE_TYPE")
-    tts_model: str = Field("en_US-amy-medium", env="TTS_MODEL")
-    tts_device: str = Field("cuda", env="TTS_DEVICE")
-    audio_chunk_ms: int = Field(200, env="AUDIO_CHUNK_MS")
-    audio_sample_rate: int = Field(8000, env="AUDIO_SAMPLE_RATE")
+    whisper_model: str = Field("turbo", validation_alias="WHISPER_MODEL")
+    whisper_device: str = Field("cuda", validation_alias="WHISPER_DEVICE")
+    whisper_compute_type: str = Field("int8", validation_alias="WHISPER_COMPUTE_TYPE")
+    tts_model: str = Field("en_US-amy-medium", validation_alias="TTS_MODEL")
+    tts_device: str = Field("cuda", validation_alias="TTS_DEVICE")
+    audio_chunk_ms: int = Field(200, validation_alias="AUDIO_CHUNK_MS")
+    audio_sample_rate: int = Field(8000, validation_alias="AUDIO_SAMPLE_RATE")
     
     # Performance Tuning
-    max_concurrent_calls: int = Field(10, env="MAX_CONCURRENT_CALLS")
-    enable_gpu: bool = Field(True, env="ENABLE_GPU")
-    num_worker_threads: int = Field(4, env="NUM_WORKER_THREADS")
-    response_timeout_ms: int = Field(5000, env="RESPONSE_TIMEOUT_MS")
-    vad_aggressiveness: int = Field(3, env="VAD_AGGRESSIVENESS")
+    max_concurrent_calls: int = Field(10, validation_alias="MAX_CONCURRENT_CALLS")
+    enable_gpu: bool = Field(True, validation_alias="ENABLE_GPU")
+    num_worker_threads: int = Field(4, validation_alias="NUM_WORKER_THREADS")
+    response_timeout_ms: int = Field(5000, validation_alias="RESPONSE_TIMEOUT_MS")
+    vad_aggressiveness: int = Field(3, validation_alias="VAD_AGGRESSIVENESS")
+    vad_energy_threshold: float = Field(0.01, validation_alias="VAD_ENERGY_THRESHOLD")
+    response_cache_size: int = Field(256, validation_alias="RESPONSE_CACHE_SIZE")
+    response_cache_threshold: float = Field(0.92, validation_alias="RESPONSE_CACHE_THRESHOLD")
     
     # Features
-    enable_echo_cancellation: bool = Field(True, env="ENABLE_ECHO_CANCELLATION")
-    enable_noise_reduction: bool = Field(True, env="ENABLE_NOISE_REDUCTION")
-    enable_interruption_handling: bool = Field(True, env="ENABLE_INTERRUPTION_HANDLING")
-    enable_backchannel_detection: bool = Field(True, env="ENABLE_BACKCHANNEL_DETECTION")
+    enable_echo_cancellation: bool = Field(True, validation_alias="ENABLE_ECHO_CANCELLATION")
+    enable_noise_reduction: bool = Field(True, validation_alias="ENABLE_NOISE_REDUCTION")
+    enable_interruption_handling: bool = Field(True, validation_alias="ENABLE_INTERRUPTION_HANDLING")
+    enable_backchannel_detection: bool = Field(True, validation_alias="ENABLE_BACKCHANNEL_DETECTION")
+    enable_response_cache: bool = Field(False, validation_alias="ENABLE_RESPONSE_CACHE")
     
     # Monitoring
-    enable_metrics: bool = Field(True, env="ENABLE_METRICS")
-    metrics_port: int = Field(9090, env="METRICS_PORT")
-    log_level: str = Field("INFO", env="LOG_LEVEL")
-    log_file: str = Field("phone_agent.log", env="LOG_FILE")
+    enable_metrics: bool = Field(True, validation_alias="ENABLE_METRICS")
+    metrics_port: int = Field(9090, validation_alias="METRICS_PORT")
+    log_level: str = Field("INFO", validation_alias="LOG_LEVEL")
+    log_file: str = Field("phone_agent.log", validation_alias="LOG_FILE")
+    
+    @field_validator("whisper_compute_type")
+    @classmethod
+    def validate_compute_type(cls, v):
+        """Restrict Whisper to the CTranslate2 quantization modes we support"""
+        allowed = {"int8", "int8_float16", "float16", "int8_bfloat16"}
+        if v not in allowed:
+            raise ValueError(f"whisper_compute_type must be one of {sorted(allowed)}")
+        return v
+    
+    # Settings are read on every utterance and never change at runtime
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=False,
+        frozen=True,
+        populate_by_name=True
+    )
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
-        
 settings = Settings()
@@ -29,18 +29,27 @@ class InterruptionHandler:
             "no",
             "hmm"
         ]
+        # Exact-match lookup, including the variants Whisper ends with a period
+        self._backchannel_set = frozenset(self.backchannel_patterns) | frozenset(
+            pattern + "." for pattern in self.backchannel_patterns
+        )
         self.interruption_history = deque(maxlen=10)
         
+        # Strong references to running callback tasks (the loop only keeps
+        # weak ones) and a cap on how many run at once
+        self._pending_tasks = set()
+        self._callback_limit = asyncio.Semaphore(8)
+        
     def start_assistant_speech(self):
         """Mark when assistant starts speaking"""
         self.is_assistant_speaking = True
-        self.speech_start_time = time.time()
+        self.speech_start_time = time.monotonic()
         logger.debug("Assistant started speaking")
     
     def end_assistant_speech(self):
         """Mark when assistant stops speaking"""
         if self.is_assistant_speaking:
-            duration = time.time() - self.speech_start_time
+            duration = time.monotonic() - self.speech_start_time
             self.is_assistant_speaking = False
             logger.debug(f"Assistant stopped speaking after {duration:.2f}s")
             
@@ -63,11 +72,12 @@ class InterruptionHandler:
                 logger.debug(f"Backchannel detected: {user_transcript}")
                 return False
                 
-        # Record interruption
+        # Record interruption (timestamps are monotonic, for duration math only)
+        now = time.monotonic()
         self.interruption_history.append({
-            'timestamp': time.time(),
+            'timestamp': now,
             'transcript': user_transcript,
-            'assistant_speech_duration': time.time() - self.speech_start_time
+            'assistant_speech_duration': now - self.speech_start_time
         })
         
         logger.info(f"Interruption detected: {user_transcript}")
@@ -75,7 +85,9 @@ class InterruptionHandler:
         # Trigger callbacks
         for callback in self.interruption_callbacks:
             try:
-                asyncio.create_task(callback())
+                task = asyncio.create_task(self._run_callback(callback))
+                self._pending_tasks.add(task)
+                task.add_done_callback(self._pending_tasks.discard)
             except Exception as e:
                 logger.error(f"Interruption callback error: {e}")
                 
@@ -93,11 +105,15 @@ class InterruptionHandler:
             return False
             
         # Check against known patterns
-        for pattern in self.backchannel_patterns:
-            if text_lower == pattern or text_lower == pattern + ".":
-                return True
-                
-        return False
+        return text_lower in self._backchannel_set
+        
+    async def _run_callback(self, callback: Callable):
+        """Run an interruption callback under the concurrency limit"""
+        async with self._callback_limit:
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Interruption callback error: {e}")
         
     def register_callback(self, callback: Callable):
         """Register a callback for interruption events"""
@@ -118,9 +134,10 @@ class InterruptionHandler:
             return True
             
         # Check interruption frequency
+        now = time.monotonic()
         recent_interruptions = [
             i for i in self.interruption_history
-            if time.time() - i['timestamp'] < 10
+            if now - i['timestamp'] < 10
         ]
         
         # If user interrupts frequently, be more responsive
@@ -145,7 +162,7 @@ class InterruptionHandler:
         avg_duration = sum(durations) / len(durations) if durations else 0
         
         # Calculate recent rate (last 60 seconds)
-        current_time = time.time()
+        current_time = time.monotonic()
         recent = [
             i for i in self.interruption_history
             if current_time - i['timestamp'] < 60
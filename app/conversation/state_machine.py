@@ -5,6 +5,7 @@ from enum import Enum
 from typing import Optional, Callable
 import logging
 import time
+from collections import deque
 
 logger = logging.getLogger(__name__)
 
@@ -21,63 +22,70 @@ class ConversationState(Enum):
 class ConversationStateMachine:
     """Manage conversation state transitions"""
     
-    def __init__(self, call_sid: str):
+    # Valid transitions, shared by every call
+    transitions = {
+        ConversationState.INITIALIZING: frozenset({
+            ConversationState.LISTENING
+        }),
+        ConversationState.LISTENING: frozenset({
+            ConversationState.PROCESSING,
+            ConversationState.ENDING
+        }),
+        ConversationState.PROCESSING: frozenset({
+            ConversationState.SPEAKING,
+            ConversationState.LISTENING
+        }),
+        ConversationState.SPEAKING: frozenset({
+            ConversationState.LISTENING,
+            ConversationState.INTERRUPTED
+        }),
+        ConversationState.INTERRUPTED: frozenset({
+            ConversationState.LISTENING
+        }),
+        ConversationState.ENDING: frozenset({
+            ConversationState.ENDED
+        }),
+        ConversationState.ENDED: frozenset()
+    }
+    
+    def __init__(self, call_sid: str, clock: Callable[[], float] = time.monotonic):
         self.call_sid = call_sid
         self.current_state = ConversationState.INITIALIZING
         self.previous_state = None
-        self.state_start_time = time.time()
-        self.state_history = []
+        # Monotonic clock for durations; immune to wall-clock adjustments
+        # and injectable for tests
+        self._clock = clock
+        self.state_start_time = clock()
+        # Recent transitions only; long calls would otherwise grow this forever
+        self.state_history = deque(maxlen=128)
+        self.transition_count = 0
         
         # State transition callbacks
         self.callbacks = {}
-        
-        # Valid transitions
-        self.transitions = {
-            ConversationState.INITIALIZING: [
-                ConversationState.LISTENING
-            ],
-            ConversationState.LISTENING: [
-                ConversationState.PROCESSING,
-                ConversationState.ENDING
-            ],
-            ConversationState.PROCESSING: [
-                ConversationState.SPEAKING,
-                ConversationState.LISTENING
-            ],
-            ConversationState.SPEAKING: [
-                ConversationState.LISTENING,
-                ConversationState.INTERRUPTED
-            ],
-            ConversationState.INTERRUPTED: [
-                ConversationState.LISTENING
-            ],
-            ConversationState.ENDING: [
-                ConversationState.ENDED
-            ],
-            ConversationState.ENDED: []
-        }
     
     def transition_to(self, new_state: ConversationState) -> bool:
         """Transition to a new state"""
         # Check if transition is valid
-        if new_state not in self.transitions.get(self.current_state, []):
+        if new_state not in self.transitions[self.current_state]:
             logger.warning(
                 f"Invalid transition from {self.current_state} to {new_state}"
             )
             return False
             
         # Record state change
+        now = self._clock()
         self.state_history.append({
             'from': self.current_state,
             'to': new_state,
             'timestamp': time.time(),
-            'duration': time.time() - self.state_start_time
+            'duration': now - self.state_start_time
         })
+        self.transition_count += 1
         
         # Update state
         self.previous_state = self.current_state
         self.current_state = new_state
-        self.state_start_time = time.time()
+        self.state_start_time = now
         
         logger.info(f"Call {self.call_sid}: {self.previous_state} -> {self.current_state}")
         
@@ -96,7 +104,7 @@ class ConversationStateMachine:
         
     def get_state_duration(self) -> float:
         """Get duration in current state"""
-        return time.time() - self.state_start_time
+        return self._clock() - self.state_start_time
         
     def is_in_state(self, state: ConversationState) -> bool:
         """Check if currently in a specific state"""
@@ -104,7 +112,7 @@ class ConversationStateMachine:
         
     def can_transition_to(self, state: ConversationState) -> bool:
         """Check if transition to state is valid"""
-        return state in self.transitions.get(self.current_state, [])
+        return state in self.transitions[self.current_state]
         
     def get_summary(self) -> dict:
         """Get state machine summary"""
@@ -113,5 +121,5 @@ class ConversationStateMachine:
             'current_state': self.current_state.value,
             'previous_state': self.previous_state.value if self.previous_state else None,
             'state_duration': self.get_state_duration(),
-            'total_states': len(self.state_history)
+            'total_states': self.transition_count
         }
@@ -3,17 +3,22 @@ Turn management for natural conversation flow
 """
 import time
 import re
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 import logging
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Sentence-ending punctuation, counted directly instead of splitting
+_SENTENCE_END_RE = re.compile(r'[.!?]')
+
 class TurnManager:
     """Manage conversation turns and detect when to respond"""
     
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        # Monotonic clock for speech timing; injectable for tests
+        self._clock = clock
         self.min_speech_duration_ms = 300
         self.max_pause_before_response_ms = 800
         self.interruption_threshold_ms = 100
@@ -36,6 +41,8 @@ class TurnManager:
             "okay?",
             "you know?"
         ]
+        # Single alternation so each transcript is scanned once
+        self._turn_end_re = re.compile("|".join(map(re.escape, self.turn_end_phrases)))
     
     def is_turn_complete(self, transcript: str, silence_duration: float) -> bool:
         """Determine if user has finished their turn"""
@@ -43,7 +50,7 @@ class TurnManager:
         
         # Check minimum speech duration
         if self.speech_start > 0:
-            speech_duration = (time.time() - self.speech_start) * 1000
+            speech_duration = (self._clock() - self.speech_start) * 1000
             if speech_duration < self.min_speech_duration_ms:
                 return False
                 
@@ -70,8 +77,7 @@ class TurnManager:
         
     def _contains_turn_end(self, text: str) -> bool:
         """Check if text contains turn-ending phrases"""
-        text_lower = text.lower()
-        return any(phrase in text_lower for phrase in self.turn_end_phrases)
+        return self._turn_end_re.search(text.lower()) is not None
     
     def _check_prosody(self, transcript: str) -> bool:
         """Check prosodic cues for turn completion"""
@@ -81,29 +87,30 @@ class TurnManager:
         if transcript.rstrip().endswith('.'):
             return True
             
-        # Multiple short sentences often indicate completion
-        sentences = re.split(r'[.!?]', transcript)
-        if len(sentences) > 2:
+        # Multiple short sentences often indicate completion; splitting on
+        # n terminators gives n + 1 parts, so this is "two or more"
+        terminators = _SENTENCE_END_RE.finditer(transcript)
+        if next(terminators, None) and next(terminators, None):
             return True
             
         return False
         
     def start_speech(self):
         """Mark the start of user speech"""
-        self.speech_start = time.time()
+        self.speech_start = self._clock()
         self.is_user_speaking = True
         logger.debug("User started speaking")
         
     def end_speech(self):
         """Mark the end of user speech"""
-        self.last_speech_end = time.time()
+        self.last_speech_end = self._clock()
         self.is_user_speaking = False
         logger.debug("User stopped speaking")
         
     def is_interruption(self, assistant_speaking: bool) -> bool:
         """Detect if user is interrupting"""
         if assistant_speaking and self.is_user_speaking:
-            time_since_start = (time.time() - self.speech_start) * 1000
+            time_since_start = (self._clock() - self.speech_start) * 1000
             if time_since_start > self.interruption_threshold_ms:
                 logger.info("User interruption detected")
                 return True
@@ -4,7 +4,7 @@ Context manager for conversation history
 from typing import Dict, Any, List, Optional
 import time
 import logging
-from collections import defaultdict, deque
+from collections import deque
 
 from app.config import settings
 
@@ -14,7 +14,7 @@ class ContextManager:
     """Manage conversation context and history"""
     
     def __init__(self):
-        self.contexts: Dict[str, Dict[str, Any]] = defaultdict(self._create_context)
+        self.contexts: Dict[str, Dict[str, Any]] = {}
         self.max_history_turns = 10
         self.context_window_tokens = 2048
         
@@ -24,15 +24,22 @@ class ContextManager:
             'call_sid': None,
             'start_time': time.time(),
             'history': deque(maxlen=self.max_history_turns),
+            # Formatted turns kept alongside history, plus the joined text
+            # (None until requested again after a change)
+            'history_lines': deque(maxlen=self.max_history_turns),
+            'history_text': "",
             'metadata': {},
             'turn_count': 0
         }
         
     def get_context(self, call_sid: str) -> Dict[str, Any]:
-        """Get context for a call"""
-        if call_sid not in self.contexts:
-            self.contexts[call_sid]['call_sid'] = call_sid
-        return self.contexts[call_sid]
+        """Get context for a call, creating it on first use"""
+        context = self.contexts.get(call_sid)
+        if context is None:
+            context = self._create_context()
+            context['call_sid'] = call_sid
+            self.contexts[call_sid] = context
+        return context
     
     def add_turn(self, call_sid: str, user_input: str, assistant_response: str):
         """Add a conversation turn to history"""
@@ -46,6 +53,8 @@ class ContextManager:
         }
         
         context['history'].append(turn)
+        context['history_lines'].append(f"User: {user_input}\nAssistant: {assistant_response}")
+        context['history_text'] = None
         context['turn_count'] += 1
         
         logger.debug(f"Added turn {context['turn_count']} for call {call_sid}")
@@ -58,17 +67,18 @@ class ContextManager:
     def get_history_text(self, call_sid: str, max_turns: Optional[int] = None) -> str:
         """Get conversation history as text"""
         context = self.get_context(call_sid)
-        history = list(context['history'])
+        lines = context['history_lines']
         
-        if max_turns:
-            history = history[-max_turns:]
+        if max_turns and max_turns < len(lines):
+            # Join only the requested tail of the pre-formatted turns
+            start = len(lines) - max_turns
+            return "\n".join(lines[i] for i in range(start, len(lines)))
             
-        text_parts = []
-        for turn in history:
-            text_parts.append(f"User: {turn['user']}")
-            text_parts.append(f"Assistant: {turn['assistant']}")
+        # Full history is joined once per change and reused until the next turn
+        if context['history_text'] is None:
+            context['history_text'] = "\n".join(lines)
             
-        return "\n".join(text_parts)
+        return context['history_text']
         
     def clear_context(self, call_sid: str):
         """Clear context for a call"""
@@ -2,31 +2,78 @@
 Ollama client for local LLM inference
 """
 import aiohttp
-import asyncio
 import json
-from typing import Optional, AsyncGenerator, Dict, Any
+from typing import Optional, AsyncGenerator, Dict, Any, List
 import logging
 import time
 
 from app.config import settings
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# One pooled HTTP session for the whole process, so every client reuses the
+# same keep-alive connections to Ollama
+_session: Optional[aiohttp.ClientSession] = None
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the shared Ollama HTTP session, creating it on first use"""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=64,
+            limit_per_host=16,
+            keepalive_timeout=300,
+            enable_cleanup_closed=True
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.ollama_timeout),
+            # Large read buffer so a fast token stream is drained in big
+            # chunks instead of pausing the transport at the 64KB default
+            read_bufsize=2 ** 20
+        )
+    return _session
+
+async def close_session():
+    """Close the shared HTTP session (called on application shutdown)"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
 class OllamaClient:
     """Client for Ollama local LLM API"""
     
     def __init__(self):
         self.base_url = settings.ollama_host
         self.model = settings.ollama_model
+        self.embedding_model = settings.ollama_embedding_model
         self.temperature = settings.ollama_temperature
         self.max_tokens = settings.ollama_max_tokens
-        self.timeout = aiohttp.ClientTimeout(total=settings.ollama_timeout)
+        self.keep_alive = settings.ollama_keep_alive  # Keep the model resident between calls
+        self.context_tokens = 2048
         self.session: Optional[aiohttp.ClientSession] = None
         
     async def _ensure_session(self):
         """Ensure aiohttp session exists"""
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(timeout=self.timeout)
+            self.session = await get_session()
+    
+    def _options(self) -> Dict[str, Any]:
+        """Sampling and runtime options; Ollama ignores these as top-level fields"""
+        return {
+            "temperature": self.temperature,
+            "num_predict": self.max_tokens,
+            "num_ctx": self.context_tokens,
+            "num_batch": 512,  # Prompt evaluation batch size
+            "num_thread": settings.num_worker_threads
+        }
     
     async def test_connection(self) -> bool:
         """Test connection to Ollama server"""
@@ -50,7 +97,12 @@ class OllamaClient:
             return False
             
     async def generate(self, prompt: str, context: Optional[str] = None) -> str:
-        """Generate response from Ollama"""
+        """
+        Generate a complete response from Ollama
+        
+        Waits for the whole completion; prefer generate_stream on the call
+        path so speech can start after the first sentence.
+        """
         await self._ensure_session()
         
         try:
@@ -59,9 +111,9 @@ class OllamaClient:
             payload = {
                 "model": self.model,
                 "prompt": prompt,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-                "stream": False
+                "options": self._options(),
+                "stream": False,
+                "keep_alive": self.keep_alive
             }
             
             if context:
@@ -87,6 +139,37 @@ class OllamaClient:
             logger.error(f"Ollama generation error: {e}")
             return ""
     
+    async def embed(self, text: str) -> Optional[List[float]]:
+        """
+        Embed text with the configured embedding model
+        
+        Returns:
+            Embedding vector, or None if the request failed
+        """
+        await self._ensure_session()
+        
+        try:
+            payload = {
+                "model": self.embedding_model,
+                "prompt": text,
+                "keep_alive": self.keep_alive
+            }
+            
+            async with self.session.post(
+                f"{self.base_url}/api/embeddings",
+                json=payload
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    return data.get("embedding") or None
+                else:
+                    logger.error(f"Ollama embedding failed: {response.status}")
+                    return None
+                    
+        except Exception as e:
+            logger.error(f"Ollama embedding error: {e}")
+            return None
+            
     async def generate_stream(
         self, 
         prompt: str, 
@@ -99,9 +182,9 @@ class OllamaClient:
             payload = {
                 "model": self.model,
                 "prompt": prompt,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens,
-                "stream": True
+                "options": self._options(),
+                "stream": True,
+                "keep_alive": self.keep_alive
             }
             
             if context:
@@ -112,19 +195,35 @@ class OllamaClient:
                 json=payload
             ) as response:
                 if response.status == 200:
-                    async for line in response.content:
-                        if line:
+                    # Ollama sends one JSON object per line; read whatever has
+                    # arrived and parse every complete line in the buffer
+                    buffer = bytearray()
+                    done = False
+                    async for data_chunk in response.content.iter_any():
+                        buffer += data_chunk
+                        
+                        *lines, tail = buffer.split(b"\n")
+                        buffer = bytearray(tail)
+                        
+                        for line in lines:
+                            if not line.strip():
+                                continue
                             try:
-                                data = json.loads(line)
-                                token = data.get("response", "")
-                                if token:
-                                    yield token
-                                    
-                                if data.get("done", False):
-                                    break
-                                    
-                            except json.JSONDecodeError:
+                                data = _json_loads(line)
+                            except ValueError:
+                                logger.warning(f"Skipping malformed Ollama line: {line[:80]!r}")
                                 continue
+                                
+                            token = data.get("response", "")
+                            if token:
+                                yield token
+                                
+                            if data.get("done", False):
+                                done = True
+                                break
+                                
+                        if done:
+                            break
                 else:
                     logger.error(f"Ollama streaming failed: {response.status}")
                     
@@ -132,11 +231,5 @@ class OllamaClient:
             logger.error(f"Ollama streaming error: {e}")
             
     async def close(self):
-        """Close the HTTP session"""
-        if self.session and not self.session.closed:
-            await self.session.close()
-            
-    def __del__(self):
-        """Cleanup on deletion"""
-        if self.session and not self.session.closed:
-            asyncio.create_task(self.session.close())
+        """Release the HTTP session; the shared pool stays open for other clients"""
+        self.session = None
@@ -2,52 +2,135 @@
 Response generator for conversation
 """
 import asyncio
+import re
+import time
 from typing import Optional, List, Dict, Any
 import logging
 import yaml
 import os
+from functools import lru_cache
 
+from app.config import settings
 from app.llm.ollama_client import OllamaClient
 from app.llm.context_manager import ContextManager
+from app.llm.semantic_cache import get_response_cache, MIN_SEMANTIC_WORDS
 
 logger = logging.getLogger(__name__)
 
+# libyaml's C parser when PyYAML was built with it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# After a failed embedding request (e.g. the embedding model is not pulled)
+# semantic lookups pause, and the pause doubles on each further failure up
+# to a limit; exact matches keep working meanwhile
+_EMBED_RETRY_MIN = 5.0
+_EMBED_RETRY_MAX = 300.0
+_embed_retry_delay = 0.0
+_embed_retry_at = 0.0
+
+def _embeddings_available() -> bool:
+    """Whether semantic lookups are outside a failure backoff window"""
+    return time.monotonic() >= _embed_retry_at
+
+def _record_embedding_result(succeeded: bool):
+    """Reset the backoff on success, extend it on failure"""
+    global _embed_retry_delay, _embed_retry_at
+    if succeeded:
+        _embed_retry_delay = 0.0
+        return
+        
+    _embed_retry_delay = min(max(_embed_retry_delay * 2, _EMBED_RETRY_MIN), _EMBED_RETRY_MAX)
+    _embed_retry_at = time.monotonic() + _embed_retry_delay
+    logger.warning(f"Embeddings unavailable; semantic cache paused for {_embed_retry_delay:.0f}s")
+
+# Sentence boundary: closing punctuation (plus optional quote/bracket)
+# followed by whitespace, so partial tokens like "3." are not split early
+_SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]?\s+')
+
+# URLs are replaced with a spoken placeholder
+_URL_RE = re.compile(r'https?://\S+')
+
+# Common abbreviations expanded for TTS
+_ABBREVIATIONS = (
+    ('Dr.', 'Doctor'),
+    ('Mr.', 'Mister'),
+    ('Mrs.', 'Missus'),
+    ('Ms.', 'Miss'),
+    ('etc.', 'et cetera'),
+    ('vs.', 'versus'),
+    ('e.g.', 'for example'),
+    ('i.e.', 'that is'),
+)
+
+@lru_cache(maxsize=1)
+def _load_system_prompt() -> str:
+    """Load system prompt from configuration (parsed once per process)"""
+    try:
+        config_path = "./config/config.yaml"
+        if os.path.exists(config_path):
+            with open(config_path, 'r') as f:
+                config = yaml.load(f, Loader=_YAML_LOADER)
+                return config.get('conversation', {}).get('system_prompt', '')
+    except Exception as e:
+        logger.error(f"Failed to load system prompt: {e}")
+        
+    # Default prompt
+    return """You are a helpful and conversational AI phone assistant.
+Keep responses concise and natural for voice conversation.
+Avoid using special formatting or long explanations.
+Be friendly and engaging."""
+
 class ResponseGenerator:
     """Generate contextual responses using LLM"""
     
     def __init__(self):
         self.ollama = OllamaClient()
         self.context_manager = ContextManager()
-        self.system_prompt = self._load_system_prompt()
+        self.system_prompt = _load_system_prompt()
+        self.prompt_history_turns = 5
+        self._history_prefix = f"{self.system_prompt}\n\nConversation history:"
+        self.response_cache = get_response_cache() if settings.enable_response_cache else None
         
-    def _load_system_prompt(self) -> str:
-        """Load system prompt from configuration"""
-        try:
-            config_path = "./config/config.yaml"
-            if os.path.exists(config_path):
-                with open(config_path, 'r') as f:
-                    config = yaml.safe_load(f)
-                    return config.get('conversation', {}).get('system_prompt', '')
-        except Exception as e:
-            logger.error(f"Failed to load system prompt: {e}")
-            
-        # Default prompt
-        return """You are a helpful and conversational AI phone assistant.
-Keep responses concise and natural for voice conversation.
-Avoid using special formatting or long explanations.
-Be friendly and engaging."""
-    
     async def generate(self, user_input: str, call_sid: str) -> str:
         """Generate response for user input"""
         try:
             # Get conversation context
             context = self.context_manager.get_context(call_sid)
+            cache_key = self._cache_key(call_sid, context)
             
-            # Build prompt
-            prompt = self._build_prompt(user_input, context)
+            # Answer repeated utterances from the cache
+            response = self._exact_response(user_input, cache_key)
             
-            # Generate response
-            response = await self.ollama.generate(prompt)
+            if response is None:
+                # The embedding runs alongside generation instead of ahead of it
+                embed_task = self._start_embedding(user_input)
+                llm_task = None
+                try:
+                    # Build prompt
+                    prompt = self._build_prompt(user_input, context)
+                    
+                    # Generate response
+                    llm_task = asyncio.create_task(self.ollama.generate(prompt))
+                    
+                    if embed_task is not None:
+                        # The embedding usually returns long before the LLM; a
+                        # semantic hit makes the generation unnecessary
+                        await asyncio.wait({embed_task, llm_task}, return_when=asyncio.FIRST_COMPLETED)
+                        response = self._similar_response(embed_task, cache_key)
+                        
+                    if response is None:
+                        response = await llm_task
+                        if response:
+                            # The cache now owns the embedding task
+                            self._store_response(user_input, cache_key, response, embed_task)
+                            embed_task = None
+                finally:
+                    # Never leave an embedding or an open Ollama request
+                    # running unowned (semantic hit, empty answer, error
+                    # or cancellation of this call)
+                    for task in (embed_task, llm_task):
+                        if task is not None and not task.done():
+                            task.cancel()
             
             if response:
                 # Update context
@@ -64,22 +147,82 @@ Be friendly and engaging."""
             logger.error(f"Response generation error: {e}")
             return "I apologize, I'm having trouble processing that. Can you try again?"
             
+    @staticmethod
+    def _cache_key(call_sid: str, context: Dict[str, Any]) -> str:
+        """
+        Cache scope for a turn: the call plus its previous assistant turn
+        
+        Answers depend on what the caller said earlier (names, account
+        details), so entries are never shared between calls.
+        """
+        history = context.get('history')
+        previous = history[-1]['assistant'] if history else ""
+        return f"{call_sid}\n{previous}"
+        
+    def _exact_response(self, user_input: str, cache_key: str) -> Optional[str]:
+        """Cached response for the same normalized utterance, if any"""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get(user_input, cache_key)
+        
+    def _start_embedding(self, user_input: str) -> Optional[asyncio.Task]:
+        """Embed the utterance in the background for the semantic cache"""
+        if (
+            self.response_cache is None
+            or len(user_input.split()) < MIN_SEMANTIC_WORDS
+            or not _embeddings_available()
+        ):
+            return None
+        return asyncio.create_task(self._embed(user_input))
+        
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """Embed text, recording failures for the retry backoff"""
+        embedding = await self.ollama.embed(text)
+        _record_embedding_result(embedding is not None)
+        return embedding
+        
+    def _similar_response(self, embed_task: Optional[asyncio.Task], cache_key: str) -> Optional[str]:
+        """Semantic cache hit, if the utterance's embedding has already arrived"""
+        if embed_task is None or not embed_task.done() or embed_task.cancelled():
+            return None
+            
+        embedding = embed_task.result()
+        if embedding is None:
+            return None
+        return self.response_cache.get_similar(embedding, cache_key)
+        
+    def _store_response(
+        self,
+        user_input: str,
+        cache_key: str,
+        response: str,
+        embed_task: Optional[asyncio.Task]
+    ):
+        """Cache a generated response, adding its embedding once it arrives"""
+        if self.response_cache is None:
+            return
+            
+        self.response_cache.put(user_input, cache_key, response)
+        
+        if embed_task is not None:
+            def put_embedding(task: asyncio.Task):
+                if not task.cancelled() and task.result() is not None:
+                    self.response_cache.put(user_input, cache_key, response, task.result())
+                    
+            embed_task.add_done_callback(put_embedding)
+        
     def _build_prompt(self, user_input: str, context: Dict[str, Any]) -> str:
         """Build prompt with context"""
-        prompt_parts = [self.system_prompt]
-        
-        # Add conversation history
-        if context.get('history'):
-            prompt_parts.append("\nConversation history:")
-            for turn in context['history'][-5:]:  # Last 5 turns
-                prompt_parts.append(f"User: {turn['user']}")
-                prompt_parts.append(f"Assistant: {turn['assistant']}")
-                
-        # Add current input
-        prompt_parts.append(f"\nUser: {user_input}")
-        prompt_parts.append("Assistant:")
+        if not context.get('history_lines'):
+            return f"{self.system_prompt}\n\nUser: {user_input}\nAssistant:"
+            
+        # Turns are formatted once when added, so only the recent strings
+        # are joined here
+        history = self.context_manager.get_history_text(
+            context['call_sid'], max_turns=self.prompt_history_turns
+        )
         
-        return "\n".join(prompt_parts)
+        return f"{self._history_prefix}\n{history}\n\nUser: {user_input}\nAssistant:"
     
     def _process_for_voice(self, text: str) -> str:
         """Process text for natural voice output"""
@@ -88,22 +231,12 @@ Be friendly and engaging."""
         text = text.replace('#', '').replace('`', '')
         
         # Remove URLs (hard to speak)
-        import re
-        text = re.sub(r'http[s]?://\S+', 'link', text)
+        if '://' in text:
+            text = _URL_RE.sub('link', text)
         
-        # Expand common abbreviations
-        abbreviations = {
-            'Dr.': 'Doctor',
-            'Mr.': 'Mister',
-            'Mrs.': 'Missus',
-            'Ms.': 'Miss',
-            'etc.': 'et cetera',
-            'vs.': 'versus',
-            'e.g.': 'for example',
-            'i.e.': 'that is',
-        }
-        
-        for abbr, full in abbreviations.items():
+        # Expand common abbreviations. str.replace returns the same string
+        # when there is no match, so absent abbreviations cost no allocation
+        for abbr, full in _ABBREVIATIONS:
             text = text.replace(abbr, full)
             
         # Ensure proper sentence ending
@@ -116,27 +249,68 @@ Be friendly and engaging."""
         """Stream response generation for lower latency"""
         try:
             context = self.context_manager.get_context(call_sid)
+            cache_key = self._cache_key(call_sid, context)
+            
+            cached = self._exact_response(user_input, cache_key)
+            if cached is not None:
+                self.context_manager.add_turn(call_sid, user_input, cached)
+                yield self._process_for_voice(cached)
+                return
+                
+            # The embedding runs alongside generation instead of ahead of it
+            embed_task = self._start_embedding(user_input)
+            semantic_pending = embed_task is not None
+            
             prompt = self._build_prompt(user_input, context)
             
-            response_text = ""
-            async for token in self.ollama.generate_stream(prompt):
-                response_text += token
+            tokens = []
+            pending = ""
+            stream = self.ollama.generate_stream(prompt)
+            async for token in stream:
+                # Until the first sentence is spoken, a semantic hit can
+                # still replace the generated answer
+                if semantic_pending and embed_task.done():
+                    semantic_pending = False
+                    cached = self._similar_response(embed_task, cache_key)
+                    if cached is not None:
+                        break
+                        
+                tokens.append(token)
+                # A boundary can only end in the new token; it starts at most
+                # two characters (punctuation plus closing quote) before it
+                start = max(len(pending) - 2, 0)
+                pending += token
                 
-                # Yield complete sentences for TTS
-                if token in '.!?':
-                    sentence = self._process_for_voice(response_text)
+                # Yield complete sentences for TTS as soon as they close
+                match = _SENTENCE_END_RE.search(pending, start)
+                while match:
+                    sentence = pending[:match.end()].strip()
+                    pending = pending[match.end():]
                     if sentence:
-                        yield sentence
-                        response_text = ""
+                        semantic_pending = False
+                        yield self._process_for_voice(sentence)
+                    match = _SENTENCE_END_RE.search(pending)
+                    
+            if cached is not None:
+                await stream.aclose()
+                self.context_manager.add_turn(call_sid, user_input, cached)
+                yield self._process_for_voice(cached)
+                return
                         
             # Yield any remaining text
-            if response_text:
-                yield self._process_for_voice(response_text)
+            if pending.strip():
+                yield self._process_for_voice(pending.strip())
+                
+            complete_response = "".join(tokens)
+            if not complete_response:
+                yield "I'm sorry, I didn't quite catch that. Could you please repeat?"
+                return
                 
             # Update context with complete response
-            complete_response = "".join([response_text])
             self.context_manager.add_turn(call_sid, user_input, complete_response)
             
+            self._store_response(user_input, cache_key, complete_response, embed_task)
+            
         except Exception as e:
             logger.error(f"Stream generation error: {e}")
             yield "I'm having trouble with that request."
@@ -0,0 +1,131 @@
+"""
+Semantic response cache shared across calls
+"""
+import re
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Short replies ("yes", "no", "hello") embed close together whatever they
+# mean, so they only ever match exactly
+MIN_SEMANTIC_WORDS = 3
+
+_NON_WORD_RE = re.compile(r"[^\w\s']+")
+
+
+class SemanticCache:
+    """
+    LLM responses keyed by what the caller said and a context key
+
+    Lookups first try the normalized utterance exactly, then the nearest
+    stored embedding by cosine similarity. Both only match entries stored
+    under the same context key; the response generator uses the call plus
+    its previous assistant turn, so "yes" to one question never answers
+    another and one caller's answers are never given to another. Embeddings
+    are unit-normalized rows of a fixed-size matrix used as a ring buffer.
+    """
+
+    def __init__(self, capacity: int = 256, threshold: float = 0.92):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._exact: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._vectors: Optional[np.ndarray] = None
+        self._context_hashes = np.zeros(capacity, dtype=np.int64)
+        self._responses = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace"""
+        return " ".join(_NON_WORD_RE.sub(" ", text.lower()).split())
+
+    def get(self, text: str, context_key: str) -> Optional[str]:
+        """Exact lookup of a normalized utterance"""
+        key = (self.normalize(text), context_key)
+        response = self._exact.get(key)
+        if response is not None:
+            self._exact.move_to_end(key)
+        return response
+
+    def get_similar(self, embedding: np.ndarray, context_key: str) -> Optional[str]:
+        """
+        Nearest-neighbour lookup by embedding
+
+        Args:
+            embedding: Embedding of the utterance
+            context_key: Scope the entry was stored under
+
+        Returns:
+            Cached response if the closest entry with the same context key
+            reaches the similarity threshold, else None
+        """
+        if self._size == 0 or self._vectors is None or len(embedding) != self._vectors.shape[1]:
+            return None
+
+        query = self._unit(embedding)
+        similarities = self._vectors[:self._size] @ query
+        similarities[self._context_hashes[:self._size] != hash(context_key)] = -1.0
+
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return self._responses[best]
+        return None
+
+    def put(
+        self,
+        text: str,
+        context_key: str,
+        response: str,
+        embedding: Optional[np.ndarray] = None
+    ):
+        """Store a response under its utterance and, if given, its embedding"""
+        key = (self.normalize(text), context_key)
+        self._exact[key] = response
+        self._exact.move_to_end(key)
+        while len(self._exact) > self.capacity:
+            self._exact.popitem(last=False)
+
+        if embedding is None:
+            return
+
+        if self._vectors is None or self._vectors.shape[1] != len(embedding):
+            # First embedding (or a new embedding model) fixes the dimension
+            self._vectors = np.zeros((self.capacity, len(embedding)), dtype=np.float32)
+            self._next = self._size = 0
+
+        self._vectors[self._next] = self._unit(embedding)
+        self._context_hashes[self._next] = hash(context_key)
+        self._responses[self._next] = response
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        """Float32 copy scaled to unit length"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm > 0 else vector
+
+    def clear(self):
+        """Drop all entries"""
+        self._exact.clear()
+        self._vectors = None
+        self._responses = [None] * self.capacity
+        self._next = self._size = 0
+
+
+_cache: Optional[SemanticCache] = None
+
+def get_response_cache() -> SemanticCache:
+    """Get the process-wide response cache, creating it on first use"""
+    global _cache
+    if _cache is None:
+        _cache = SemanticCache(settings.response_cache_size, settings.response_cache_threshold)
+    return _cache
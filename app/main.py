@@ -3,6 +3,7 @@ Main FastAPI application for Phone AI Agent
 """
 import os
 import sys
+import importlib.util
 from pathlib import Path
 
 # Add parent directory to path for imports
@@ -10,10 +11,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from fastapi import FastAPI, WebSocket, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 import uvicorn
 import asyncio
-from typing import Dict, Any
 import logging
 
 from app.config import settings
@@ -40,32 +40,32 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize metrics collector
+# Initialize metrics collector; it also tracks active calls and their handlers
 metrics = MetricsCollector()
 
-# Store active WebSocket connections
-active_connections: Dict[str, TwilioWebSocketHandler] = {}
-
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
     logger.info("Starting Phone AI Agent...")
     
     # Initialize models and services
-    from app.audio.whisper_turbo import WhisperTurbo
-    from app.llm.ollama_client import OllamaClient
-    from app.audio.tts_engine import TTSEngine
+    from app.services import get_whisper, get_ollama, get_tts
     
-    # Preload models for faster first response
+    # Preload models for faster first response; /health reports on these
+    # same instances
     logger.info("Preloading models...")
-    whisper = WhisperTurbo()
-    await whisper.initialize()
+    await get_whisper().initialize()
+    
+    await get_ollama().test_connection()
+    
+    await get_tts().initialize()
     
-    ollama = OllamaClient()
-    await ollama.test_connection()
+    # Reuse FFT plans saved by the previous run (see shutdown_event)
+    from app.audio._fft_plan import load_wisdom
+    load_wisdom()
     
-    tts = TTSEngine()
-    await tts.initialize()
+    # TwiML only depends on settings, so serialize it once
+    app.state.twiml_bytes = _build_twiml()
     
     logger.info("Phone AI Agent started successfully")
 
@@ -75,8 +75,21 @@ async def shutdown_event():
     logger.info("Shutting down Phone AI Agent...")
     
     # Close all active connections
-    for call_sid, handler in active_connections.items():
-        await handler.close()
+    for context in list(metrics.active_calls.values()):
+        if context.handler is not None:
+            await context.handler.close()
+    
+    # Stop the startup TTS engine's Piper process
+    from app.services import get_tts
+    await get_tts().close()
+    
+    # Close the pooled Ollama connections
+    from app.llm.ollama_client import close_session
+    await close_session()
+    
+    # Persist FFT plans so the next start skips FFTW planning
+    from app.audio._fft_plan import save_wisdom
+    save_wisdom()
     
     logger.info("Phone AI Agent shutdown complete")
 
@@ -87,14 +100,13 @@ async def root():
         "status": "running",
         "service": "Phone AI Agent",
         "version": "1.0.0",
-        "active_calls": len(active_connections)
+        "active_calls": len(metrics.active_calls)
     }
 
 @app.get("/health")
 async def health_check():
     """Detailed health check"""
-    from app.audio.whisper_turbo import WhisperTurbo
-    from app.llm.ollama_client import OllamaClient
+    from app.services import get_whisper, get_ollama, get_tts
     
     health_status = {
         "status": "healthy",
@@ -107,19 +119,15 @@ async def health_check():
     
     try:
         # Check Whisper
-        whisper = WhisperTurbo()
-        if whisper.model:
+        if get_whisper().model:
             health_status["checks"]["whisper"] = True
             
         # Check Ollama
-        ollama = OllamaClient()
-        if await ollama.test_connection():
+        if await get_ollama().test_connection():
             health_status["checks"]["ollama"] = True
             
         # Check TTS
-        from app.audio.tts_engine import TTSEngine
-        tts = TTSEngine()
-        if tts.is_ready:
+        if get_tts().is_ready:
             health_status["checks"]["tts"] = True
             
     except Exception as e:
@@ -133,30 +141,27 @@ async def websocket_endpoint(websocket: WebSocket):
     """Twilio Media Stream WebSocket endpoint"""
     await websocket.accept()
     
-    call_sid = None
     handler = None
     
     try:
         # Create handler for this connection
         handler = TwilioWebSocketHandler(websocket, metrics)
         
-        # Process the WebSocket connection
-        call_sid = await handler.handle_connection()
+        # Process the WebSocket connection; the handler registers the call
+        # with the metrics collector when the stream starts
+        await handler.handle_connection()
         
-        if call_sid:
-            active_connections[call_sid] = handler
-            
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        if call_sid and call_sid in active_connections:
-            del active_connections[call_sid]
+        # Streams dropped without a stop event are still registered
+        if handler and handler.call_sid in metrics.active_calls:
+            metrics.record_call_end(handler.call_sid)
         if handler:
             await handler.close()
 
-@app.post("/twiml")
-async def twiml_webhook(request: Request):
-    """Generate TwiML for incoming calls"""
+def _build_twiml() -> bytes:
+    """Serialize the TwiML that connects a call to the media stream"""
     from twilio.twiml.voice_response import VoiceResponse, Connect, Stream
     
     response = VoiceResponse()
@@ -174,16 +179,36 @@ async def twiml_webhook(request: Request):
     connect.append(stream)
     response.append(connect)
     
-    return JSONResponse(
-        content=str(response),
-        media_type="application/xml"
-    )
+    return str(response).encode()
 
-if __name__ == "__main__":
+@app.post("/twiml")
+async def twiml_webhook(request: Request):
+    """Generate TwiML for incoming calls"""
+    twiml = getattr(request.app.state, "twiml_bytes", None)
+    if twiml is None:
+        twiml = request.app.state.twiml_bytes = _build_twiml()
+    
+    return Response(content=twiml, media_type="application/xml")
+
+def main():
+    """Run the server"""
+    # uvloop and httptools ship with uvicorn[standard]; uvicorn would fall
+    # back to asyncio/h11 silently, so pick them explicitly and say so
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    if loop != "uvloop" or http != "httptools":
+        logger.warning(f"Running with {loop} event loop and {http} parser; install uvicorn[standard] for uvloop/httptools")
+    
+    # Pass the app object rather than an import string so this module is
+    # not imported a second time (which would re-register the metrics)
     uvicorn.run(
-        "main:app",
+        app,
         host=settings.server_host,
         port=settings.server_port,
-        reload=True,
+        loop=loop,
+        http=http,
         log_level=settings.log_level.lower()
     )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+"""
+Process-wide service instances used by the app's startup and health endpoints
+"""
+from functools import lru_cache
+
+from app.audio.whisper_turbo import WhisperTurbo
+from app.audio.tts_engine import TTSEngine
+from app.llm.ollama_client import OllamaClient
+
+@lru_cache(maxsize=None)
+def get_whisper() -> WhisperTurbo:
+    """Shared Whisper wrapper (initialized at startup)"""
+    return WhisperTurbo()
+
+@lru_cache(maxsize=None)
+def get_ollama() -> OllamaClient:
+    """Shared Ollama client"""
+    return OllamaClient()
+
+@lru_cache(maxsize=None)
+def get_tts() -> TTSEngine:
+    """Shared TTS engine (initialized at startup)"""
+    return TTSEngine()
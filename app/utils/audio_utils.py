@@ -2,28 +2,82 @@
 Audio utility functions for format conversion and processing
 """
 import numpy as np
-import audioop
 from scipy import signal
 import struct
 import logging
+from functools import lru_cache
+from math import gcd
+from typing import Optional
+
+try:
+    import soxr
+    SOXR_AVAILABLE = True
+except ImportError:
+    SOXR_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+def _build_mulaw_decode_table() -> np.ndarray:
+    """G.711 mu-law to 16-bit linear PCM for every code byte"""
+    code = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (code >> 4) & 0x07
+    mantissa = code & 0x0F
+    magnitude = (((mantissa << 3) + 0x84) << exponent) - 0x84
+    return np.where(code & 0x80, -magnitude, magnitude).astype(np.int16)
+
+def _build_mulaw_encode_table() -> np.ndarray:
+    """G.711 mu-law code for every int16 sample, indexed by its uint16 bits"""
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), 8158) + 0x21
+    
+    # Segment is the position of the leading bit above the 6-bit floor
+    segment = np.frexp(pcm)[1] - 6
+    np.clip(segment, 0, 7, out=segment)
+    
+    code = ((segment << 4) | ((pcm >> (segment + 1)) & 0x0F)) ^ mask
+    return np.roll(code.astype(np.uint8), -32768)
+
+# Lookup tables built once at import; both match audioop bit for bit
+_MULAW_DECODE = _build_mulaw_decode_table()
+_MULAW_DECODE_FLOAT = (_MULAW_DECODE / 32768.0).astype(np.float32)
+_MULAW_ENCODE = _build_mulaw_encode_table()
+
 def mulaw_decode(mulaw_bytes: bytes) -> np.ndarray:
     """Decode mu-law encoded audio to PCM"""
     try:
-        # Use audioop to decode mu-law to linear PCM
-        pcm_bytes = audioop.ulaw2lin(mulaw_bytes, 2)
-        
-        # Convert to numpy array
-        pcm_array = np.frombuffer(pcm_bytes, dtype=np.int16)
+        # One table gather per byte; np.take skips fancy-indexing overhead
+        codes = np.frombuffer(mulaw_bytes, dtype=np.uint8)
         
-        return pcm_array
+        return np.take(_MULAW_DECODE, codes)
         
     except Exception as e:
         logger.error(f"Mu-law decode error: {e}")
         return np.array([], dtype=np.int16)
 
+def mulaw_decode_to_float32(mulaw_bytes: bytes, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Decode mu-law encoded audio straight to float32 in [-1, 1)"""
+    try:
+        codes = np.frombuffer(mulaw_bytes, dtype=np.uint8)
+        
+        if out is None or len(out) != len(codes):
+            out = np.empty(len(codes), dtype=np.float32)
+            
+        # Gather pre-scaled samples, without an intermediate int16 array
+        np.take(_MULAW_DECODE_FLOAT, codes, out=out)
+        
+        return out
+        
+    except Exception as e:
+        logger.error(f"Mu-law decode error: {e}")
+        return np.array([], dtype=np.float32)
+
+def float_to_int16(audio: np.ndarray) -> np.ndarray:
+    """Convert float audio in [-1, 1) to int16 with clipping"""
+    scaled = np.multiply(audio, 32768.0, dtype=np.float32)
+    np.clip(scaled, -32768, 32767, out=scaled)
+    return scaled.astype(np.int16)
+
 def mulaw_encode(pcm_array: np.ndarray) -> bytes:
     """Encode PCM audio to mu-law"""
     try:
@@ -31,11 +85,8 @@ def mulaw_encode(pcm_array: np.ndarray) -> bytes:
         if pcm_array.dtype != np.int16:
             pcm_array = pcm_array.astype(np.int16)
             
-        # Convert to bytes
-        pcm_bytes = pcm_array.tobytes()
-        
-        # Use audioop to encode to mu-law
-        mulaw_bytes = audioop.lin2ulaw(pcm_bytes, 2)
+        # Index the 64K-entry table by the raw sample bits
+        mulaw_bytes = np.take(_MULAW_ENCODE, pcm_array.view(np.uint16)).tobytes()
         
         return mulaw_bytes
         
@@ -43,23 +94,51 @@ def mulaw_encode(pcm_array: np.ndarray) -> bytes:
         logger.error(f"Mu-law encode error: {e}")
         return b''
 
+# Largest reduced up/down factor resampled with a polyphase FIR; the filter
+# has 20 taps per unit of the larger factor, so odd rate pairs such as
+# 44101 -> 8000 fall back to FFT resampling
+MAX_POLYPHASE_FACTOR = 1000
+
+@lru_cache(maxsize=None)
+def _polyphase_fir(up: int, down: int) -> np.ndarray:
+    """Low-pass FIR for polyphase resampling, designed once per ratio"""
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    fir = signal.firwin(2 * half_len + 1, 1.0 / max_rate, window=('kaiser', 5.0))
+    fir.setflags(write=False)
+    return fir
+
 def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
     """Resample audio to target sample rate"""
     if orig_sr == target_sr:
         return audio
         
     try:
-        # Calculate resampling ratio
-        ratio = target_sr / orig_sr
-        
-        # Calculate new length
-        new_length = int(len(audio) * ratio)
+        # Reduce to integer up/down factors
+        g = gcd(orig_sr, target_sr)
+        up, down = target_sr // g, orig_sr // g
+        
+        if SOXR_AVAILABLE:
+            # SIMD polyphase resampler; keeps float32/int16 without a float64 pass
+            resampled = soxr.resample(audio, orig_sr, target_sr)
+        elif max(up, down) <= MAX_POLYPHASE_FACTOR:
+            # Telephony (8kHz <-> 16kHz) and TTS (22.05kHz -> 8kHz) ratios use
+            # a polyphase filter with a cached FIR. Unlike a full-length FFT
+            # its cost does not depend on how the chunk length factorizes.
+            resampled = signal.resample_poly(audio, up, down, window=_polyphase_fir(up, down))
+        else:
+            # Calculate new length
+            new_length = int(len(audio) * target_sr / orig_sr)
+            
+            # Use scipy for resampling
+            resampled = signal.resample(audio, new_length)
         
-        # Use scipy for resampling
-        resampled = signal.resample(audio, new_length)
-        
-        # Ensure int16 type
-        return resampled.astype(np.int16)
+        # Preserve input type (int16 PCM or float32 samples); filter
+        # overshoot must saturate rather than wrap for integer PCM
+        if np.issubdtype(audio.dtype, np.integer):
+            limits = np.iinfo(audio.dtype)
+            resampled = np.clip(resampled, limits.min, limits.max)
+        return resampled.astype(audio.dtype)
         
     except Exception as e:
         logger.error(f"Resample error: {e}")
@@ -68,18 +147,17 @@ def resample_audio(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarra
 def normalize_audio(audio: np.ndarray, target_level: float = 0.8) -> np.ndarray:
     """Normalize audio volume"""
     try:
-        # Calculate current peak
-        peak = np.max(np.abs(audio))
+        # Peak magnitude from two reductions; np.abs would allocate and
+        # wraps -32768 back to itself for int16
+        peak = max(float(audio.max()), -float(audio.min())) if len(audio) else 0.0
         
         if peak > 0:
             # Calculate scaling factor
-            scale = (target_level * 32767) / peak
-            
-            # Apply scaling
-            normalized = audio * scale
+            scale = np.float32((target_level * 32767) / peak)
             
-            # Clip to prevent overflow
-            normalized = np.clip(normalized, -32768, 32767)
+            # Scale and clip in one float32 buffer instead of a float64 upcast
+            normalized = np.multiply(audio, scale, dtype=np.float32)
+            np.clip(normalized, -32768, 32767, out=normalized)
             
             return normalized.astype(np.int16)
         
@@ -90,21 +168,21 @@ def normalize_audio(audio: np.ndarray, target_level: float = 0.8) -> np.ndarray:
         return audio
 
 def chunk_audio(audio: bytes, chunk_size_ms: int, sample_rate: int) -> list:
-    """Split audio into chunks"""
+    """
+    Split 16-bit PCM into chunks
+    
+    Chunks are memoryview slices of the input, so no audio is copied; use
+    bytes(chunk) where an independent bytes object is needed.
+    """
     try:
         # Calculate chunk size in bytes
         bytes_per_sample = 2  # 16-bit audio
         samples_per_chunk = int(sample_rate * chunk_size_ms / 1000)
         bytes_per_chunk = samples_per_chunk * bytes_per_sample
         
-        # Split into chunks
-        chunks = []
-        for i in range(0, len(audio), bytes_per_chunk):
-            chunk = audio[i:i + bytes_per_chunk]
-            if chunk:
-                chunks.append(chunk)
-                
-        return chunks
+        # Split into zero-copy views
+        view = memoryview(audio).cast('B')
+        return [view[i:i + bytes_per_chunk] for i in range(0, len(view), bytes_per_chunk)]
         
     except Exception as e:
         logger.error(f"Chunk error: {e}")
@@ -1,23 +1,45 @@
 """
 Logging configuration for the application
 """
+import atexit
+import copy
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Optional
 import structlog
 from pythonjsonlogger import jsonlogger
 
 from app.config import settings
 
-def setup_logging(name: str) -> logging.Logger:
-    """Setup structured logging"""
+# Records are queued by the calling thread and formatted/written by a single
+# listener thread, so logging never blocks the event loop on JSON or disk IO
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves traceback and JSON formatting to the listener
     
-    # Create logger
-    logger = logging.getLogger(name)
-    logger.setLevel(getattr(logging, settings.log_level.upper()))
+    The message is merged with its args in the calling thread, so later
+    changes to mutable args do not show up in the log. exc_info is kept
+    for the formatter, which means the traceback's frames (and their
+    locals) stay alive until the listener has written the record.
+    """
     
-    # Remove existing handlers
-    logger.handlers = []
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def _start_listener():
+    """Create the console/file handlers and start the listener thread once"""
+    global _listener
+    if _listener is not None:
+        return
     
     # Console handler
     console_handler = logging.StreamHandler(sys.stdout)
@@ -37,8 +59,27 @@ def setup_logging(name: str) -> logging.Logger:
     console_handler.setFormatter(json_formatter)
     file_handler.setFormatter(json_formatter)
     
-    # Add handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    _listener = QueueListener(
+        _log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+    
+    # Flush queued records on interpreter exit
+    atexit.register(_listener.stop)
+
+def setup_logging(name: str) -> logging.Logger:
+    """Setup structured logging"""
+    
+    # Create logger
+    logger = logging.getLogger(name)
+    logger.setLevel(getattr(logging, settings.log_level.upper()))
+    
+    # Remove existing handlers
+    logger.handlers = []
+    
+    # Hand records to the background listener
+    _start_listener()
+    logger.addHandler(_DeferredQueueHandler(_log_queue))
+    logger.propagate = False
     
     return logger
@@ -3,11 +3,18 @@ Metrics collection for monitoring and performance tracking
 """
 from prometheus_client import Counter, Histogram, Gauge, generate_latest
 import time
+from dataclasses import dataclass
 from typing import Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+@dataclass(slots=True)
+class CallContext:
+    """State kept for each active call"""
+    start_ns: int  # time.monotonic_ns() at stream start
+    handler: Any = None  # WebSocket handler serving the call
+
 class MetricsCollector:
     """Collect and expose application metrics"""
     
@@ -22,6 +29,10 @@ class MetricsCollector:
         self.llm_latency = Histogram('llm_latency_ms', 'LLM response latency in milliseconds')
         self.tts_latency = Histogram('tts_latency_ms', 'Text-to-speech latency in milliseconds')
         self.first_response_latency = Histogram('first_response_latency_ms', 'Time to first response')
+        self.call_duration = Histogram(
+            'call_duration_seconds', 'Call duration in seconds',
+            buckets=(15, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+        )
         
         # Audio metrics
         self.audio_chunks_processed = Counter('audio_chunks_processed', 'Total audio chunks processed')
@@ -33,23 +44,41 @@ class MetricsCollector:
         self.llm_errors = Counter('llm_errors', 'LLM generation errors')
         self.tts_errors = Counter('tts_errors', 'Text-to-speech errors')
         
-        # Call tracking
-        self.call_start_times: Dict[str, float] = {}
+        # Active calls by call SID
+        self.active_calls: Dict[str, CallContext] = {}
+        
+        # Plain counts mirrored next to the Prometheus objects, so the
+        # summary is a dict read instead of locked child-value lookups
+        self._active_calls = 0
+        self._total_calls = 0
+        self._failed_calls = 0
+        self._interruptions = 0
+        
+        # Encoded exposition output reused for scrapes within the TTL
+        self.metrics_cache_ttl = 1.0
+        self._metrics_cache = b''
+        self._metrics_cache_time = float('-inf')
     
-    def record_call_start(self, call_sid: str):
-        """Record call start"""
+    def record_call_start(self, call_sid: str) -> CallContext:
+        """Record call start and return the call's context"""
         self.calls_total.inc()
         self.calls_active.inc()
-        self.call_start_times[call_sid] = time.time()
+        self._total_calls += 1
+        self._active_calls += 1
+        context = self.active_calls[call_sid] = CallContext(time.monotonic_ns())
         logger.info(f"Call started: {call_sid}")
+        return context
         
     def record_call_end(self, call_sid: str):
         """Record call end"""
         self.calls_active.dec()
+        self._active_calls -= 1
         
-        if call_sid in self.call_start_times:
-            duration = time.time() - self.call_start_times[call_sid]
-            del self.call_start_times[call_sid]
+        context = self.active_calls.pop(call_sid, None)
+        if context is not None:
+            # Integer nanoseconds until the single conversion for reporting
+            duration = (time.monotonic_ns() - context.start_ns) / 1e9
+            self.call_duration.observe(duration)
             logger.info(f"Call ended: {call_sid}, duration: {duration:.2f}s")
             
     def record_stt_latency(self, latency_ms: float):
@@ -71,6 +100,7 @@ class MetricsCollector:
     def record_interruption(self):
         """Record user interruption"""
         self.interruptions.inc()
+        self._interruptions += 1
         
     def record_error(self, error_type: str):
         """Record error by type"""
@@ -82,14 +112,18 @@ class MetricsCollector:
             self.tts_errors.inc()
             
     def get_metrics(self) -> bytes:
-        """Get Prometheus metrics"""
-        return generate_latest()
+        """Get Prometheus metrics, re-encoding the registry at most once per TTL"""
+        now = time.monotonic()
+        if now - self._metrics_cache_time >= self.metrics_cache_ttl:
+            self._metrics_cache = generate_latest()
+            self._metrics_cache_time = now
+        return self._metrics_cache
         
     def get_summary(self) -> Dict[str, Any]:
         """Get metrics summary"""
         return {
-            'active_calls': self.calls_active._value.get(),
-            'total_calls': self.calls_total._value.get(),
-            'failed_calls': self.calls_failed._value.get(),
-            'interruptions': self.interruptions._value.get()
+            'active_calls': self._active_calls,
+            'total_calls': self._total_calls,
+            'failed_calls': self._failed_calls,
+            'interruptions': self._interruptions
         }
@@ -3,8 +3,10 @@ Twilio WebSocket handler for media streams
 """
 import json
 import asyncio
-import base64
-from typing import Optional, Dict, Any
+from binascii import a2b_base64, b2a_base64
+from typing import Optional, Dict, Any, List, Tuple
+import anyio
+from anyio.abc import TaskGroup
 from fastapi import WebSocket
 import logging
 
@@ -12,6 +14,16 @@ from app.audio.processor import AudioProcessor
 from app.conversation.state_machine import ConversationStateMachine
 from app.utils.metrics import MetricsCollector
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+
+    def _json_dumps(message: Dict[str, Any]) -> str:
+        return orjson.dumps(message).decode("utf-8")
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 logger = logging.getLogger(__name__)
 
 class TwilioWebSocketHandler:
@@ -25,14 +37,26 @@ class TwilioWebSocketHandler:
         self.audio_processor: Optional[AudioProcessor] = None
         self.conversation_state: Optional[ConversationStateMachine] = None
         self.is_connected = True
-        self.tasks = []
+        
+        # Reader, pipeline and writer run in one task group; the pipeline
+        # waits for the stream start event
+        self._task_group: Optional[TaskGroup] = None
+        self._started = asyncio.Event()
+        
+        # Outbound media/mark messages, serialized and sent in order by one
+        # writer task; the bound applies back-pressure to the TTS output
+        self._outbound: asyncio.Queue = asyncio.Queue(maxsize=64)
+        self.max_coalesced_messages = 16
         
     async def handle_connection(self) -> Optional[str]:
         """Handle the WebSocket connection lifecycle"""
         try:
-            while self.is_connected:
-                message = await self.websocket.receive_text()
-                await self._process_message(json.loads(message))
+            # A failing worker cancels the others and the group re-raises
+            async with anyio.create_task_group() as tg:
+                self._task_group = tg
+                tg.start_soon(self._receive_messages)
+                tg.start_soon(self._run_pipeline)
+                tg.start_soon(self._write_outbound)
                 
         except Exception as e:
             logger.error(f"WebSocket connection error: {e}")
@@ -41,6 +65,21 @@ class TwilioWebSocketHandler:
             
         return self.call_sid
     
+    async def _receive_messages(self):
+        """Read messages until the stream stops, then stop the other workers"""
+        try:
+            while self.is_connected:
+                # Twilio sends JSON in text frames
+                message = await self.websocket.receive_text()
+                await self._process_message(_json_loads(message))
+        finally:
+            self._task_group.cancel_scope.cancel()
+            
+    async def _run_pipeline(self):
+        """Run the audio processor once the stream has started"""
+        await self._started.wait()
+        await self.audio_processor.start()
+    
     async def _process_message(self, message: Dict[str, Any]):
         """Process incoming WebSocket messages"""
         event = message.get("event")
@@ -72,20 +111,22 @@ class TwilioWebSocketHandler:
         self.audio_processor = AudioProcessor(self)
         self.conversation_state = ConversationStateMachine(self.call_sid)
         
-        # Start audio processing pipeline
-        process_task = asyncio.create_task(self.audio_processor.start())
-        self.tasks.append(process_task)
+        # Let the pipeline worker start processing
+        self._started.set()
         
-        # Record metrics
-        self.metrics.record_call_start(self.call_sid)
+        # Record metrics and register the call with this handler
+        context = self.metrics.record_call_start(self.call_sid)
+        context.handler = self
     
     async def _handle_media(self, message: Dict[str, Any]):
         """Handle incoming audio media"""
         media = message.get("media", {})
         
-        if self.audio_processor:
-            # Decode base64 audio
-            audio_data = base64.b64decode(media.get("payload", ""))
+        payload = media.get("payload")
+        
+        if self.audio_processor and payload:
+            # Decode base64 audio with the C codec directly
+            audio_data = a2b_base64(payload)
             timestamp = media.get("timestamp")
             
             # Process audio chunk
@@ -109,59 +150,94 @@ class TwilioWebSocketHandler:
             await self.audio_processor.handle_mark(mark_name)
             
     async def send_audio(self, audio_data: bytes, track: str = "outbound"):
-        """Send audio to Twilio"""
+        """Queue mu-law audio to send to Twilio"""
         if not self.is_connected:
             return
             
-        # Encode audio as base64
-        audio_payload = base64.b64encode(audio_data).decode("utf-8")
+        await self._outbound.put(("media", audio_data, track))
+            
+    async def send_mark(self, name: str):
+        """Queue a mark event to track audio playback"""
+        if not self.is_connected:
+            return
+            
+        await self._outbound.put(("mark", name, None))
+        
+    async def _write_outbound(self):
+        """Send queued messages, merging consecutive audio into one frame"""
+        while True:
+            items = [await self._outbound.get()]
+            while len(items) < self.max_coalesced_messages and not self._outbound.empty():
+                items.append(self._outbound.get_nowait())
+                
+            for message in self._build_messages(items):
+                try:
+                    await self.websocket.send_text(_json_dumps(message))
+                except Exception as e:
+                    logger.error(f"Error sending {message['event']}: {e}")
+                    
+            for _ in items:
+                self._outbound.task_done()
+                
+    def _build_messages(self, items: List[Tuple[str, Any, Optional[str]]]) -> List[Dict[str, Any]]:
+        """
+        Turn queued items into Twilio messages
+        
+        Audio queued back to back on the same track becomes a single media
+        message, so a backlog is base64-encoded and sent in one frame; marks
+        keep their position between the audio around them.
+        """
+        messages = []
+        pending = bytearray()
+        pending_track = None
+        
+        for kind, data, track in items:
+            if kind == "media" and track == pending_track:
+                pending += data
+                continue
+                
+            if pending:
+                messages.append(self._media_message(pending, pending_track))
+                pending = bytearray()
+                pending_track = None
+                
+            if kind == "media":
+                pending += data
+                pending_track = track
+            else:
+                messages.append({
+                    "event": "mark",
+                    "streamSid": self.stream_sid,
+                    "mark": {
+                        "name": data
+                    }
+                })
+                
+        if pending:
+            messages.append(self._media_message(pending, pending_track))
+            
+        return messages
         
-        message = {
+    def _media_message(self, audio_data: bytes, track: str) -> Dict[str, Any]:
+        """Build a media message carrying base64-encoded mu-law audio"""
+        return {
             "event": "media",
             "streamSid": self.stream_sid,
             "media": {
                 "track": track,
                 "chunk": "1",
                 "timestamp": "0",
-                "payload": audio_payload
-            }
-        }
-        
-        try:
-            await self.websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending audio: {e}")
-            
-    async def send_mark(self, name: str):
-        """Send a mark event to track audio playback"""
-        if not self.is_connected:
-            return
-            
-        message = {
-            "event": "mark",
-            "streamSid": self.stream_sid,
-            "mark": {
-                "name": name
+                "payload": b2a_base64(audio_data, newline=False).decode("ascii")
             }
         }
-        
-        try:
-            await self.websocket.send_text(json.dumps(message))
-        except Exception as e:
-            logger.error(f"Error sending mark: {e}")
             
     async def close(self):
         """Clean up and close the connection"""
         self.is_connected = False
         
-        # Cancel all tasks
-        for task in self.tasks:
-            if not task.done():
-                task.cancel()
-                
-        # Wait for tasks to complete
-        if self.tasks:
-            await asyncio.gather(*self.tasks, return_exceptions=True)
+        # Cancel the reader, pipeline and writer together
+        if self._task_group is not None:
+            self._task_group.cancel_scope.cancel()
             
         # Clean up processors
         if self.audio_processor:
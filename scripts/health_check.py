@@ -6,73 +6,72 @@ import asyncio
 import aiohttp
 import sys
 from pathlib import Path
+from typing import List, Tuple
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-async def check_api_health():
+async def check_api_health(session: aiohttp.ClientSession) -> Tuple[bool, List[str]]:
     """Check API health endpoint"""
-    print("Checking API health...")
+    lines = ["Checking API health..."]
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get("http://localhost:8000/health") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    print("✅ API is running")
-                    print(f"   Status: {data.get('status')}")
-                    print(f"   Whisper: {data.get('checks', {}).get('whisper')}")
-                    print(f"   Ollama: {data.get('checks', {}).get('ollama')}")
-                    print(f"   TTS: {data.get('checks', {}).get('tts')}")
-                    return True
-                else:
-                    print(f"❌ API returned status {response.status}")
-                    return False
+        async with session.get("http://localhost:8000/health") as response:
+            if response.status == 200:
+                data = await response.json()
+                lines.append("✅ API is running")
+                lines.append(f"   Status: {data.get('status')}")
+                lines.append(f"   Whisper: {data.get('checks', {}).get('whisper')}")
+                lines.append(f"   Ollama: {data.get('checks', {}).get('ollama')}")
+                lines.append(f"   TTS: {data.get('checks', {}).get('tts')}")
+                return True, lines
+            else:
+                lines.append(f"❌ API returned status {response.status}")
+                return False, lines
     except Exception as e:
-        print(f"❌ Failed to connect to API: {e}")
-        return False
+        lines.append(f"❌ Failed to connect to API: {e}")
+        return False, lines
 
-async def check_ollama():
+async def check_ollama(session: aiohttp.ClientSession) -> Tuple[bool, List[str]]:
     """Check Ollama connection"""
-    print("\nChecking Ollama...")
+    lines = ["\nChecking Ollama..."]
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get("http://localhost:11434/api/tags") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    models = [m["name"] for m in data.get("models", [])]
-                    print("✅ Ollama is running")
-                    print(f"   Available models: {', '.join(models)}")
-                    return True
-                else:
-                    print(f"❌ Ollama returned status {response.status}")
-                    return False
+        async with session.get("http://localhost:11434/api/tags") as response:
+            if response.status == 200:
+                data = await response.json()
+                models = [m["name"] for m in data.get("models", [])]
+                lines.append("✅ Ollama is running")
+                lines.append(f"   Available models: {', '.join(models)}")
+                return True, lines
+            else:
+                lines.append(f"❌ Ollama returned status {response.status}")
+                return False, lines
     except Exception as e:
-        print(f"❌ Failed to connect to Ollama: {e}")
-        print("   Make sure Ollama is running: ollama serve")
-        return False
+        lines.append(f"❌ Failed to connect to Ollama: {e}")
+        lines.append("   Make sure Ollama is running: ollama serve")
+        return False, lines
 
-async def test_websocket():
+async def test_websocket() -> Tuple[bool, List[str]]:
     """Test WebSocket connection"""
-    print("\nTesting WebSocket...")
+    lines = ["\nTesting WebSocket..."]
     try:
         import websockets
         uri = "ws://localhost:8000/media-stream"
         
         async with websockets.connect(uri) as websocket:
-            print("✅ WebSocket connected")
+            lines.append("✅ WebSocket connected")
             
             # Send test message
             test_msg = '{"event": "connected"}'
             await websocket.send(test_msg)
-            print("   Sent test message")
+            lines.append("   Sent test message")
             
             # Close connection
             await websocket.close()
-            return True
+            return True, lines
             
     except Exception as e:
-        print(f"❌ WebSocket test failed: {e}")
-        return False
+        lines.append(f"❌ WebSocket test failed: {e}")
+        return False, lines
 
 async def main():
     """Run all health checks"""
@@ -80,12 +79,19 @@ async def main():
     print("Phone AI Agent Health Check")
     print("=" * 50)
     
+    # Run checks concurrently over one HTTP session; each check buffers its
+    # output so the report still prints in order
+    async with aiohttp.ClientSession() as session:
+        checks = await asyncio.gather(
+            check_api_health(session),
+            check_ollama(session),
+            test_websocket()
+        )
+        
     results = []
-    
-    # Run checks
-    results.append(await check_api_health())
-    results.append(await check_ollama())
-    results.append(await test_websocket())
+    for passed, lines in checks:
+        print("\n".join(lines))
+        results.append(passed)
     
     print("\n" + "=" * 50)
     print("Health Check Summary")
@@ -4,58 +4,391 @@ Download and install required models
 """
 import os
 import sys
-import subprocess
-import urllib.request
+import json
+import asyncio
+import hashlib
 from pathlib import Path
 
-def download_file(url, destination):
-    """Download a file with progress"""
-    def download_progress(block_num, block_size, total_size):
-        downloaded = block_num * block_size
-        percent = min(downloaded * 100 / total_size, 100)
-        print(f"Downloading: {percent:.1f}%", end='\r')
+import aiohttp
+
+OLLAMA_URL = "http://localhost:11434"
+# Only the optional semantic response cache needs the embedding model
+# (settings.ollama_embedding_model), so it is pulled only when enabled
+EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
+RESPONSE_CACHE_ENABLED = os.getenv("ENABLE_RESPONSE_CACHE", "false").lower() in ("1", "true", "yes")
+
+def default_ollama_models(*models):
+    """The given models, plus the embedding model when the response cache is on"""
+    return [*models, EMBEDDING_MODEL] if RESPONSE_CACHE_ENABLED else list(models)
+
+# Progress of interrupted downloads, keyed by URL, so a later run resumes
+CHECKPOINT_FILE = Path("./models/downloads.json")
+DOWNLOAD_RETRIES = 5
+
+# Large files are fetched as byte ranges over several connections at once
+DOWNLOAD_SPLITS = 4
+SPLIT_MIN_SIZE = 8 * 1024 * 1024
+
+# Size and SHA-256 of every completed download, so re-runs verify files
+# with a stat() instead of fetching them again
+LOCK_FILE = Path("./models/models.lock.json")
+
+def create_session():
+    """HTTP session shared by the downloads and Ollama requests of one run"""
+    # Downloads and pulls can take a long time; only a stalled stream is an error
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit_per_host=16, keepalive_timeout=60),
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=300)
+    )
+
+def load_json(path):
+    """Read a JSON state file, treating a missing or corrupt one as empty"""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def load_checkpoints():
+    """Read the download checkpoint file"""
+    return load_json(CHECKPOINT_FILE)
+
+def sha256_file(path):
+    """Hash a file in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+async def lock_file(path, sha256=None):
+    """Record a completed download's size, mtime and hash in the lock file"""
+    if sha256 is None:
+        sha256 = await asyncio.to_thread(sha256_file, path)
+    stat = path.stat()
+    lock = load_json(LOCK_FILE)
+    lock[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": sha256}
+    LOCK_FILE.write_text(json.dumps(lock, indent=2))
+
+async def verify_file(path):
+    """
+    Check an existing file against its lock entry
+    
+    The size is compared first; the file is only hashed when the size
+    matches but the mtime changed since it was locked. A file with no
+    lock entry is hashed once and recorded.
+    
+    Returns:
+        False if the file does not match the lock file
+    """
+    locked = load_json(LOCK_FILE).get(path.name)
+    stat = path.stat()
+    if locked is None:
+        await lock_file(path)
+        return True
+    if stat.st_size != locked["size"]:
+        return False
+    if stat.st_mtime_ns == locked.get("mtime"):
+        return True
+        
+    sha256 = await asyncio.to_thread(sha256_file, path)
+    if sha256 != locked["sha256"]:
+        return False
+    await lock_file(path, sha256)
+    return True
+
+def save_checkpoint(url, bytes_written=None, etag=None, size=None):
+    """Record (or with no bytes_written or size, clear) a download's progress"""
+    checkpoints = load_checkpoints()
+    if bytes_written is None and size is None:
+        checkpoints.pop(url, None)
+    else:
+        checkpoints[url] = {"bytes_written": bytes_written, "size": size, "etag": etag}
+    CHECKPOINT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CHECKPOINT_FILE.write_text(json.dumps(checkpoints, indent=2))
+
+async def ranged_size(session, url):
+    """(size, etag) of a file worth splitting, or None if it is small or ranges are unsupported"""
+    try:
+        async with session.head(url, allow_redirects=True) as response:
+            response.raise_for_status()
+            size = int(response.headers.get("Content-Length", 0))
+            if response.headers.get("Accept-Ranges") == "bytes" and size >= SPLIT_MIN_SIZE:
+                return size, response.headers.get("ETag")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        pass
+    return None
+
+async def fetch_segment(session, url, path, start, end, etag=None):
+    """
+    Download bytes start..end (inclusive) into path, resuming what it holds
+    
+    Returns:
+        True when complete, False if the server ignored the range (or the
+        file no longer matches etag), None if the connection kept failing
+    """
+    for attempt in range(DOWNLOAD_RETRIES):
+        offset = start + (path.stat().st_size if path.exists() else 0)
+        if offset > end:
+            return True
+            
+        headers = {"Range": f"bytes={offset}-{end}"}
+        if etag:
+            headers["If-Range"] = etag
+            
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status != 206:
+                    # Range ignored or the file changed; the caller falls back
+                    return False
+                with open(path, "ab") as f:
+                    async for chunk in response.content.iter_chunked(65536):
+                        f.write(chunk)
+                        
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt < DOWNLOAD_RETRIES - 1:
+                await asyncio.sleep(2 ** attempt)
+                
+    if path.exists() and start + path.stat().st_size > end:
+        return True
+    return None
+
+async def download_split(session, url, destination, size, etag=None):
+    """
+    Download a file as DOWNLOAD_SPLITS ranges in parallel
+    
+    Each range goes to its own .partN file, so an interrupted run resumes
+    every range where it stopped. The remote size and ETag are checkpointed
+    so segments left over from a different version of the file are thrown
+    away, and If-Range guards each resumed request. The ranges are joined
+    into the .part file once all of them are complete.
+    
+    Returns:
+        True when downloaded, False if the server does not honour ranges
+        or the joined file has the wrong length (the segments are removed),
+        None if a range kept failing (the segments are kept for the next run)
+    """
+    bounds = [
+        (i * size // DOWNLOAD_SPLITS, (i + 1) * size // DOWNLOAD_SPLITS - 1)
+        for i in range(DOWNLOAD_SPLITS)
+    ]
+    segments = [destination.with_name(f"{destination.name}.part{i}") for i in range(DOWNLOAD_SPLITS)]
+    
+    checkpoint = load_checkpoints().get(url, {})
+    if checkpoint.get("size") != size or checkpoint.get("etag") != etag:
+        if any(segment.exists() for segment in segments):
+            print(f"⚠️ {destination.name} changed since the last run, starting over")
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+        save_checkpoint(url, etag=etag, size=size)
+        
+    print(f"Downloading {destination.name} over {DOWNLOAD_SPLITS} connections...")
+    results = await asyncio.gather(*[
+        fetch_segment(session, url, segment, start, end, etag)
+        for segment, (start, end) in zip(segments, bounds)
+    ])
+    if False in results:
+        for segment in segments:
+            segment.unlink(missing_ok=True)
+        save_checkpoint(url)
+        return False
+    if None in results:
+        print(f"❌ Failed to download {destination.name}; rerun to resume")
+        return None
+        
+    partial = destination.with_name(destination.name + ".part")
+    with open(partial, "wb") as f:
+        for segment in segments:
+            with open(segment, "rb") as source:
+                while block := source.read(1 << 20):
+                    f.write(block)
+                    
+    for segment in segments:
+        segment.unlink()
+    save_checkpoint(url)
     
-    urllib.request.urlretrieve(url, destination, download_progress)
-    print()
+    if partial.stat().st_size != size:
+        print(f"⚠️ {destination.name} joined to the wrong length, downloading again")
+        partial.unlink()
+        return False
+    return True
+
+async def download_file(session, url, destination):
+    """
+    Download a file in chunks, resuming a previous partial download
+    
+    Bytes go to a .part file that is renamed into place when complete. On
+    a retry (or a later run) only the missing bytes are requested with an
+    HTTP Range header; If-Range makes the server send the whole file again
+    if it changed since the partial download.
+    """
+    destination = Path(destination)
+    if destination.exists():
+        if await verify_file(destination):
+            print(f"✅ {destination.name} already present")
+            return True
+            
+        print(f"⚠️ {destination.name} does not match the lock file, downloading again")
+        destination.unlink()
+        
+    partial = destination.with_name(destination.name + ".part")
+    
+    # Split large files across connections unless a single-stream
+    # download is already partway through
+    remote = None if partial.exists() else await ranged_size(session, url)
+    if remote:
+        split = await download_split(session, url, destination, *remote)
+        if split is None:
+            return False
+        if split:
+            partial.replace(destination)
+            await lock_file(destination)
+            print(f"✅ {destination.name} downloaded")
+            return True
+            
+    print(f"Downloading {destination.name}...")
+    
+    for attempt in range(DOWNLOAD_RETRIES):
+        offset = partial.stat().st_size if partial.exists() else 0
+        etag = load_checkpoints().get(url, {}).get("etag")
+        
+        headers = {}
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+            if etag:
+                headers["If-Range"] = etag
+                
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 416:
+                    # Nothing left to fetch, but only trust the partial
+                    # file if it is exactly as long as the remote one
+                    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    if total.isdigit() and int(total) == offset:
+                        break
+                        
+                    print(f"⚠️ {destination.name} partial download does not match, restarting")
+                    partial.unlink()
+                    save_checkpoint(url)
+                    continue
+                response.raise_for_status()
+                
+                # 206 continues the partial file, 200 starts it over
+                resuming = response.status == 206
+                if resuming:
+                    print(f"Resuming {destination.name} at {offset} bytes")
+                etag = response.headers.get("ETag", etag)
+                
+                with open(partial, "ab" if resuming else "wb") as f:
+                    async for chunk in response.content.iter_chunked(65536):
+                        f.write(chunk)
+            break
+            
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if isinstance(e, aiohttp.ClientResponseError) and e.status < 500:
+                # Missing or forbidden; retrying will not help
+                print(f"❌ Failed to download {destination.name}: {e}")
+                return False
+                
+            if partial.exists():
+                save_checkpoint(url, partial.stat().st_size, etag)
+            if attempt == DOWNLOAD_RETRIES - 1:
+                print(f"❌ Failed to download {destination.name}: {e}")
+                return False
+                
+            delay = 2 ** attempt
+            print(f"⚠️ {destination.name} interrupted ({e}), retrying in {delay}s")
+            await asyncio.sleep(delay)
+    else:
+        print(f"❌ Failed to download {destination.name}")
+        return False
+        
+    partial.replace(destination)
+    save_checkpoint(url)
+    await lock_file(destination)
+    print(f"✅ {destination.name} downloaded")
+    return True
+
+# The files faster-whisper needs from each Systran/faster-whisper-* repo
+WHISPER_MODEL_FILES = [
+    "config.json",
+    "preprocessor_config.json",
+    "model.bin",
+    "tokenizer.json",
+    "vocabulary.*"
+]
 
-def install_whisper_models():
+async def install_whisper_models():
     """Install Whisper models"""
     print("\nInstalling Whisper models...")
     
-    try:
-        # Import to trigger download
-        from faster_whisper import WhisperModel
+    models = ["tiny", "base", "small"]
+    models_dir = Path("./models/whisper")
+    models_dir.mkdir(parents=True, exist_ok=True)
+    
+    # faster-whisper stores each size as a Hugging Face snapshot
+    missing = []
+    for model_name in models:
+        snapshots = models_dir / f"models--Systran--faster-whisper-{model_name}" / "snapshots"
+        if any(snapshots.glob("*/model.bin")):
+            print(f"✅ {model_name} model already present")
+        else:
+            missing.append(model_name)
+            
+    if not missing:
+        return True
         
-        models = ["tiny", "base", "small"]
-        models_dir = Path("./models/whisper")
-        models_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        # Fetch the weights only; constructing WhisperModel would also load
+        # each size into memory
+        from huggingface_hub import snapshot_download
         
-        for model_name in models:
+        def download_model(model_name):
             print(f"Downloading {model_name} model...")
-            model = WhisperModel(model_name, device="cpu", download_root=str(models_dir))
+            snapshot_download(
+                repo_id=f"Systran/faster-whisper-{model_name}",
+                cache_dir=str(models_dir),
+                allow_patterns=WHISPER_MODEL_FILES,
+                max_workers=8
+            )
             print(f"✅ {model_name} model ready")
             
+        # snapshot_download blocks, so fetch every size in its own thread
+        await asyncio.gather(
+            *[asyncio.to_thread(download_model, model_name) for model_name in missing]
+        )
+            
         return True
         
     except Exception as e:
         print(f"❌ Failed to install Whisper models: {e}")
         return False
 
-def install_piper_models():
+async def install_piper_models(session):
     """Install Piper TTS models"""
     print("\nInstalling Piper TTS models...")
     
     models_dir = Path("./models/piper")
     models_dir.mkdir(parents=True, exist_ok=True)
     
-    # Piper model URLs (example - update with actual URLs)
+    # Piper voice files
+    voices_url = "https://huggingface.co/rhasspy/piper-voices/resolve/v1.0.0"
     models = {
         "en_US-amy-medium": {
-            "onnx": "https://github.com/rhasspy/piper/releases/download/v1.2.0/en_US-amy-medium.onnx",
-            "json": "https://github.com/rhasspy/piper/releases/download/v1.2.0/en_US-amy-medium.onnx.json"
+            "onnx": f"{voices_url}/en/en_US/amy/medium/en_US-amy-medium.onnx",
+            "json": f"{voices_url}/en/en_US/amy/medium/en_US-amy-medium.onnx.json"
         }
     }
     
+    # Fetch every .onnx and .json file at once
+    results = await asyncio.gather(*[
+        download_file(session, url, models_dir / url.rsplit("/", 1)[-1])
+        for files in models.values()
+        for url in files.values()
+    ])
+    
+    if all(results):
+        return True
+        
     print("⚠️ Piper models need to be downloaded manually from:")
     print("   https://github.com/rhasspy/piper/releases")
     print(f"   Place them in: {models_dir}")
@@ -70,61 +403,106 @@ def install_piper_models():
         "- en_US-amy-medium.onnx.json\n"
     )
     
-    return True
+    return False
 
-def install_ollama_models():
-    """Install Ollama models"""
-    print("\nInstalling Ollama models...")
+async def pull_model(session, name):
+    """Pull an Ollama model through the HTTP API, printing each new status"""
+    print(f"Pulling {name}...")
+    last_status = None
     
     try:
-        # Check if Ollama is running
-        result = subprocess.run(
-            ["ollama", "list"],
-            capture_output=True,
-            text=True
-        )
-        
-        if result.returncode != 0:
-            print("⚠️ Ollama not running. Start it with: ollama serve")
-            return False
-            
-        # Pull recommended models
-        models = ["llama3.2", "mistral"]
-        
-        for model in models:
-            print(f"Pulling {model}...")
-            result = subprocess.run(
-                ["ollama", "pull", model],
-                capture_output=True,
-                text=True
-            )
+        async with session.post(
+            f"{OLLAMA_URL}/api/pull",
+            json={"name": name, "stream": True}
+        ) as response:
+            response.raise_for_status()
             
-            if result.returncode == 0:
-                print(f"✅ {model} installed")
-            else:
-                print(f"⚠️ Failed to pull {model}")
+            # One JSON progress event per line
+            async for line in response.content:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
                 
+                if "error" in event:
+                    print(f"⚠️ Failed to pull {name}: {event['error']}")
+                    return False
+                    
+                status = event.get("status")
+                if status != last_status:
+                    print(f"   {name}: {status}")
+                    last_status = status
+                    
+        print(f"✅ {name} installed")
         return True
         
-    except FileNotFoundError:
-        print("❌ Ollama not found. Install from: https://ollama.ai")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        print(f"⚠️ Failed to pull {name}: {e}")
         return False
-    except Exception as e:
-        print(f"❌ Failed to install Ollama models: {e}")
+
+async def pull_models(models, session=None):
+    """
+    Pull Ollama models in parallel
+    
+    Args:
+        models: Model names
+        session: HTTP session to use; a temporary one is created if omitted
+    
+    Returns:
+        Per-model success flags, or None if the Ollama server is not reachable
+    """
+    if session is None:
+        async with create_session() as session:
+            return await pull_models(models, session)
+            
+    # Check if Ollama is running and which models it already has
+    try:
+        async with session.get(f"{OLLAMA_URL}/api/tags") as response:
+            response.raise_for_status()
+            tags = await response.json()
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+        
+    # Untagged names are stored as "<name>:latest"
+    installed = set()
+    for model in tags.get("models", []):
+        installed.add(model["name"])
+        installed.add(model["name"].removesuffix(":latest"))
+        
+    async def pull_if_missing(model):
+        if model in installed:
+            print(f"✅ {model} already installed")
+            return True
+        return await pull_model(session, model)
+        
+    return await asyncio.gather(*[pull_if_missing(model) for model in models])
+
+async def install_ollama_models(session):
+    """Install Ollama models"""
+    print("\nInstalling Ollama models...")
+    
+    # Pull recommended models
+    results = await pull_models(default_ollama_models("llama3.2", "mistral"), session)
+    
+    if results is None:
+        print("⚠️ Ollama not running. Install from https://ollama.ai and start it with: ollama serve")
         return False
+        
+    return True
 
-def main():
+async def main():
     """Install all models"""
     print("=" * 50)
     print("Model Installation")
     print("=" * 50)
     
-    results = []
-    
-    # Install models
-    results.append(install_whisper_models())
-    results.append(install_piper_models())
-    results.append(install_ollama_models())
+    # Install models concurrently; the downloads are network bound and
+    # share one pool of keep-alive connections
+    async with create_session() as session:
+        results = await asyncio.gather(
+            install_whisper_models(),
+            install_piper_models(session),
+            install_ollama_models(session)
+        )
     
     print("\n" + "=" * 50)
     print("Installation Summary")
@@ -140,4 +518,4 @@ def main():
         print("3. Run: ollama pull llama3.2")
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -4,8 +4,10 @@ Setup script for Phone AI Agent
 """
 import os
 import sys
-import subprocess
+import asyncio
+import importlib.util
 import platform
+import subprocess
 import shutil
 from pathlib import Path
 import argparse
@@ -13,8 +15,9 @@ import argparse
 class SetupManager:
     """Manage setup and installation"""
     
-    def __init__(self):
+    def __init__(self, deep_cuda_check: bool = False):
         self.base_dir = Path(__file__).parent
+        self.deep_cuda_check = deep_cuda_check
         self.os_type = platform.system().lower()
         self.python_version = sys.version_info
         
@@ -30,6 +33,37 @@ class SetupManager:
     def check_cuda(self):
         """Check CUDA availability"""
         print("Checking CUDA...")
+        if self.deep_cuda_check:
+            return self._check_cuda_torch()
+            
+        # Ask the driver for the GPU name instead of importing torch
+        device_name = self._nvidia_device_name()
+        if device_name:
+            print(f"✅ CUDA available: {device_name}")
+            return True
+            
+        print("⚠️ CUDA not available, will use CPU (slower)")
+        return False
+        
+    def _nvidia_device_name(self):
+        """Name of the first NVIDIA GPU from nvidia-smi or /proc, or None"""
+        try:
+            result = subprocess.run(["nvidia-smi", "-L"], capture_output=True, text=True)
+            if result.returncode == 0 and result.stdout.strip():
+                # "GPU 0: <name> (UUID: ...)"
+                return result.stdout.splitlines()[0].split(" (UUID")[0]
+        except OSError:
+            pass
+            
+        for information in sorted(Path("/proc/driver/nvidia/gpus").glob("*/information")):
+            for line in information.read_text().splitlines():
+                if line.startswith("Model:"):
+                    return line.split(":", 1)[1].strip()
+                    
+        return None
+        
+    def _check_cuda_torch(self):
+        """Check CUDA through PyTorch (slow import, confirms the CUDA build)"""
         try:
             import torch
             if torch.cuda.is_available():
@@ -42,41 +76,53 @@ class SetupManager:
             print("⚠️ PyTorch not installed yet")
             return False
     
-    def install_dependencies(self):
+    async def install_dependencies(self):
         """Install Python dependencies"""
         print("\nInstalling Python dependencies...")
         requirements_file = self.base_dir.parent / "requirements.txt"
         
-        try:
-            subprocess.run([
-                sys.executable, "-m", "pip", "install", "-r", str(requirements_file)
-            ], check=True)
+        # Keep wheels in a project-local cache (unless PIP_CACHE_DIR is set)
+        # so re-runs reuse them, and never fall back to source builds when a
+        # wheel exists
+        env = dict(os.environ)
+        env.setdefault("PIP_CACHE_DIR", str(self.base_dir.parent / ".pip-cache"))
+        
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "pip", "install",
+            "--prefer-binary", "--no-input", "--disable-pip-version-check",
+            "-r", str(requirements_file),
+            env=env
+        )
+        returncode = await process.wait()
+        
+        if returncode == 0:
             print("✅ Dependencies installed")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Failed to install dependencies: {e}")
-            return False
             
-    def setup_ollama(self):
+        print(f"❌ Failed to install dependencies: pip exited with status {returncode}")
+        return False
+            
+    async def setup_ollama(self):
         """Setup Ollama"""
         print("\nSetting up Ollama...")
         
-        # Check if Ollama is installed
-        if shutil.which("ollama"):
-            print("✅ Ollama found")
-            
-            # Pull default model
-            print("Pulling default model (llama3.2)...")
-            try:
-                subprocess.run(["ollama", "pull", "llama3.2"], check=True)
-                print("✅ Model downloaded")
-                return True
-            except subprocess.CalledProcessError:
-                print("⚠️ Failed to pull model, please run: ollama pull llama3.2")
-                return False
-        else:
-            print("❌ Ollama not found. Please install from https://ollama.ai")
+        # Needs aiohttp, so import after the dependencies step
+        from install_models import default_ollama_models, pull_models
+        
+        # Pull default model (and the embedding model if the cache is on)
+        models = default_ollama_models("llama3.2")
+        print(f"Pulling default models ({', '.join(models)})...")
+        results = await pull_models(models)
+        
+        if results is None:
+            print("❌ Ollama not running. Install from https://ollama.ai and start it with: ollama serve")
             return False
+        if all(results):
+            print("✅ Models downloaded")
+            return True
+            
+        print(f"⚠️ Failed to pull models, please run: {' && '.join(f'ollama pull {m}' for m in models)}")
+        return False
     
     def setup_models_directory(self):
         """Create models directory"""
@@ -121,36 +167,59 @@ class SetupManager:
             print(f"❌ Import error: {e}")
             return False
             
-    def run(self):
+    async def _setup_ollama_after(self, dependencies):
+        """Pull models, waiting for pip only if aiohttp is not installed yet"""
+        if importlib.util.find_spec("aiohttp") is None and not await dependencies:
+            print("❌ Skipping Ollama setup: dependencies failed to install")
+            return False
+        return await self.setup_ollama()
+        
+    @staticmethod
+    async def _report(name, step):
+        """Await a concurrent step and say as soon as it finishes"""
+        result = await step
+        print(f"{'✅' if result else '❌'} {name} step finished")
+        return result
+            
+    async def run(self):
         """Run complete setup"""
         print("=" * 50)
         print("Phone AI Agent Setup")
         print("=" * 50)
         
-        steps = [
-            ("Python version", self.check_python),
-            ("CUDA support", self.check_cuda),
-            ("Dependencies", self.install_dependencies),
-            ("Ollama", self.setup_ollama),
-            ("Models directory", self.setup_models_directory),
-            ("Environment", self.setup_environment),
-            ("Test imports", self.test_setup)
-        ]
-        
-        results = []
-        for name, func in steps:
+        results = {}
+        for name, func in (("Python version", self.check_python), ("CUDA support", self.check_cuda)):
             print(f"\n{name}...")
-            results.append(func())
+            results[name] = func()
+            
+        # The install, model pull and file setup steps are independent, so
+        # pip and the Ollama download overlap; the filesystem steps run on
+        # worker threads alongside them
+        dependencies = asyncio.ensure_future(self.install_dependencies())
+        steps = {
+            "Dependencies": dependencies,
+            "Ollama": self._setup_ollama_after(dependencies),
+            "Models directory": asyncio.to_thread(self.setup_models_directory),
+            "Environment": asyncio.to_thread(self.setup_environment)
+        }
+        finished = await asyncio.gather(
+            *[self._report(name, step) for name, step in steps.items()]
+        )
+        results.update(zip(steps, finished))
+        
+        # Imports can only be checked once everything is installed
+        print("\nTest imports...")
+        results["Test imports"] = self.test_setup()
             
         print("\n" + "=" * 50)
         print("Setup Summary:")
         print("=" * 50)
         
-        for (name, _), result in zip(steps, results):
+        for name, result in results.items():
             status = "✅" if result else "❌"
             print(f"{status} {name}")
             
-        if all(results):
+        if all(results.values()):
             print("\n🎉 Setup complete! You can now run the application.")
             print("\nNext steps:")
             print("1. Edit .env file with your Twilio credentials")
@@ -162,7 +231,8 @@ class SetupManager:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Setup Phone AI Agent")
     parser.add_argument("--skip-cuda", action="store_true", help="Skip CUDA check")
+    parser.add_argument("--deep-check", action="store_true", help="Check CUDA through PyTorch")
     args = parser.parse_args()
     
-    setup = SetupManager()
-    setup.run()
+    setup = SetupManager(deep_cuda_check=args.deep_check)
+    asyncio.run(setup.run())
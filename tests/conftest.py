@@ -0,0 +1,23 @@
+"""
+Shared test fixtures
+"""
+import os
+import numpy as np
+import pytest
+
+# Run Whisper on the CPU with int8 weights; set before app.config is
+# imported so the settings pick it up without probing for CUDA
+os.environ.setdefault("WHISPER_DEVICE", "cpu")
+os.environ.setdefault("WHISPER_COMPUTE_TYPE", "int8")
+os.environ.setdefault("CT2_USE_EXPERIMENTAL_PACKED_GEMM", "1")
+
+@pytest.fixture(scope="session")
+def whisper():
+    """Process-wide Whisper wrapper, so the model loads once per session"""
+    from app.services import get_whisper
+    return get_whisper()
+
+@pytest.fixture
+def rng():
+    """Freshly seeded generator, so each test draws the same numbers however it is run"""
+    return np.random.default_rng(0)
@@ -7,7 +7,12 @@ import asyncio
 from app.audio.vad import VoiceActivityDetector
 from app.audio.echo_cancellation import EchoCanceller
 from app.audio.noise_reduction import NoiseReducer
-from app.utils.audio_utils import mulaw_encode, mulaw_decode, resample_audio
+from app.utils.audio_utils import mulaw_encode, mulaw_decode, resample_audio, normalize_audio, chunk_audio
+
+# Test signals are generated once; tests must not modify them in place
+_T = np.linspace(0, 1, 16000, dtype=np.float32)
+SINE_440 = (np.sin(np.float32(2 * np.pi * 440) * _T) * np.float32(10000)).astype(np.int16)
+NOISE = (np.random.default_rng(0).standard_normal(16000, dtype=np.float32) * 2000).astype(np.int16)
 
 class TestVAD:
     """Test Voice Activity Detection"""
@@ -18,18 +23,25 @@ class TestVAD:
         silence = np.zeros(16000, dtype=np.int16)
         assert not vad.is_speech(silence)
         
-    def test_noise_detection(self):
+    def test_noise_detection(self, rng):
         """Test that random noise is handled properly"""
         vad = VoiceActivityDetector()
-        noise = (np.random.randn(16000) * 1000).astype(np.int16)
+        noise = (rng.standard_normal(16000, dtype=np.float32) * 1000).astype(np.int16)
         # Should not consistently detect as speech
         detections = [vad.is_speech(noise) for _ in range(5)]
         assert not all(detections)
         
-    def test_aggressiveness_levels(self):
+    @pytest.mark.parametrize("level", range(4))
+    def test_silence_at_each_level(self, level):
+        """Test silence is rejected at every aggressiveness level"""
+        vad = VoiceActivityDetector()
+        vad.set_aggressiveness(level)
+        assert not vad.is_speech(np.zeros(16000, dtype=np.int16))
+        
+    def test_aggressiveness_levels(self, rng):
         """Test different aggressiveness levels"""
         vad = VoiceActivityDetector()
-        test_audio = (np.random.randn(16000) * 5000).astype(np.int16)
+        test_audio = (rng.standard_normal(16000, dtype=np.float32) * 5000).astype(np.int16)
         
         results = []
         for level in range(4):
@@ -42,13 +54,14 @@ class TestVAD:
 class TestEchoCancellation:
     """Test echo cancellation"""
     
-    def test_echo_removal(self):
+    @pytest.mark.parametrize("echo_gain", [0.3, 0.5, 0.8])
+    def test_echo_removal(self, echo_gain):
         """Test basic echo cancellation"""
         canceller = EchoCanceller()
         
         # Create test signal with echo
-        original = (np.sin(2 * np.pi * 440 * np.linspace(0, 1, 16000)) * 10000).astype(np.int16)
-        echo = original * 0.5  # Simulated echo
+        original = SINE_440
+        echo = original * echo_gain  # Simulated echo
         mixed = (original + echo).astype(np.int16)
         
         # Process
@@ -56,28 +69,109 @@ class TestEchoCancellation:
         
         # Should reduce amplitude
         assert np.max(np.abs(result)) < np.max(np.abs(mixed))
-        
-    def test_no_reference(self):
+
+    def test_numba_matches_numpy(self, rng):
+        """Test the compiled NLMS kernel against the NumPy loop"""
+        pytest.importorskip("numba")
+
+        audio = rng.standard_normal(2000, dtype=np.float32) * np.float32(0.1)
+        reference = rng.standard_normal(1500, dtype=np.float32) * np.float32(0.1)
+
+        compiled = EchoCanceller()
+        fallback = EchoCanceller()
+
+        result = compiled._nlms_filter(audio, reference)
+        expected = fallback._nlms_filter_numpy(audio, reference)
+
+        assert np.allclose(result, expected, atol=1e-4)
+        assert np.allclose(compiled.weights, fallback.weights, atol=1e-4)
+
+    def test_no_reference(self, rng):
         """Test processing without reference signal"""
         canceller = EchoCanceller()
-        audio = (np.random.randn(16000) * 5000).astype(np.int16)
+        audio = (rng.standard_normal(16000, dtype=np.float32) * 5000).astype(np.int16)
         result = canceller.process(audio)
         
         # Should still return valid audio
         assert len(result) == len(audio)
         assert result.dtype == np.int16
 
+    def test_noise_estimate_tracks_level(self, rng):
+        """Test the running noise estimate follows the residual level"""
+        canceller = EchoCanceller()
+        
+        quiet = rng.standard_normal(1600, dtype=np.float32) * np.float32(0.01)
+        canceller.process_float(quiet)
+        initial = canceller._noise_est.mean()
+        
+        for _ in range(40):
+            loud = rng.standard_normal(1600, dtype=np.float32) * np.float32(0.1)
+            canceller.process_float(loud)
+            
+        assert canceller._noise_est.mean() > initial * 5
+        
+        canceller.reset()
+        assert canceller._noise_est is None
+
+    def test_noise_estimate_recovers_from_silence(self, rng):
+        """Test a silent first chunk does not pin the noise estimate at zero"""
+        canceller = EchoCanceller()
+        
+        canceller.process_float(np.zeros(1600, dtype=np.float32))
+        assert not canceller._noise_est.any()
+        
+        for _ in range(40):
+            noise = rng.standard_normal(1600, dtype=np.float32) * np.float32(0.1)
+            canceller.process_float(noise)
+            
+        assert (canceller._noise_est > 0).all()
+
+    def test_fftw_stft_roundtrip(self, rng):
+        """Test the FFTW STFT against scipy's ShortTimeFFT"""
+        pytest.importorskip("pyfftw")
+        from scipy import signal as sps
+        from app.audio._fft_plan import FFTWShortTimeFFT
+
+        audio = rng.standard_normal(1600, dtype=np.float32) * np.float32(0.1)
+        stft = FFTWShortTimeFFT(256, 128)
+        reference = sps.ShortTimeFFT(
+            sps.get_window("hann", 256), hop=128, fs=16000, scale_to="magnitude"
+        )
+
+        # Same framing and magnitudes; only the phase reference differs
+        Zxx = stft.stft(audio)
+        expected = reference.stft(audio)
+
+        assert Zxx.shape == expected.shape
+        assert np.allclose(np.abs(Zxx), np.abs(expected), atol=1e-5)
+        assert np.allclose(stft.istft(Zxx, k1=len(audio)), audio, atol=1e-5)
+
+    def test_fftw_wisdom_roundtrip(self, tmp_path):
+        """Test FFTW wisdom is saved as plain JSON and loads back"""
+        pyfftw = pytest.importorskip("pyfftw")
+        import json
+        from app.audio._fft_plan import FFTWShortTimeFFT, load_wisdom, save_wisdom
+
+        FFTWShortTimeFFT(256, 128)
+        path = str(tmp_path / "fftw_wisdom.json")
+        assert save_wisdom(path)
+        with open(path) as f:
+            assert all(isinstance(entry, str) for entry in json.load(f))
+
+        pyfftw.forget_wisdom()
+        assert load_wisdom(path)
+        assert any(pyfftw.export_wisdom())
+
 class TestNoiseReduction:
     """Test noise reduction"""
     
-    def test_noise_reduction(self):
+    @pytest.mark.parametrize("noise_scale", [0.25, 1.0, 4.0])
+    def test_noise_reduction(self, noise_scale):
         """Test basic noise reduction"""
         reducer = NoiseReducer()
         
         # Create noisy signal
-        signal = (np.sin(2 * np.pi * 440 * np.linspace(0, 1, 16000)) * 10000).astype(np.int16)
-        noise = (np.random.randn(16000) * 2000).astype(np.int16)
-        noisy = (signal + noise).astype(np.int16)
+        noisy = np.clip(SINE_440 + NOISE * noise_scale, -32768, 32767).astype(np.int16)
         
         # Process
         result = reducer.process(noisy)
@@ -86,13 +180,13 @@ class TestNoiseReduction:
         assert len(result) == len(noisy)
         assert result.dtype == np.int16
         
-    def test_calibration(self):
+    def test_calibration(self, rng):
         """Test noise profile calibration"""
         reducer = NoiseReducer()
         
         # Send multiple frames for calibration
         for _ in range(25):
-            noise = (np.random.randn(16000) * 1000).astype(np.int16)
+            noise = (rng.standard_normal(16000, dtype=np.float32) * 1000).astype(np.int16)
             reducer.process(noise)
             
         # Should have calibrated
@@ -112,9 +206,14 @@ class TestAudioUtils:
         assert len(decoded) == len(original)
         assert decoded.dtype == np.int16
         
-    def test_resampling(self):
+    def test_mulaw_tables_match_g711(self):
+        """Test the lookup tables against known G.711 code points"""
+        assert mulaw_encode(np.array([0, -1, 32767, -32768], dtype=np.int16)) == b'\xff\x7e\x80\x00'
+        assert mulaw_decode(b'\xff\x7f\x80\x00').tolist() == [0, 0, 32124, -32124]
+        
+    def test_resampling(self, rng):
         """Test audio resampling"""
-        original = np.random.randn(8000).astype(np.int16)
+        original = rng.standard_normal(8000, dtype=np.float32).astype(np.int16)
         
         # Upsample
         upsampled = resample_audio(original, 8000, 16000)
@@ -124,10 +223,67 @@ class TestAudioUtils:
         downsampled = resample_audio(original, 16000, 8000)
         assert len(downsampled) == len(original) // 2
         
-    def test_same_rate_resampling(self):
+    def test_polyphase_resampling(self, monkeypatch):
+        """Test rational ratios use the polyphase path and saturate"""
+        import app.utils.audio_utils as audio_utils
+        monkeypatch.setattr(audio_utils, "SOXR_AVAILABLE", False)
+        
+        resampled = resample_audio(np.zeros(2205, dtype=np.int16), 22050, 8000)
+        assert len(resampled) == 800
+        assert resampled.dtype == np.int16
+        
+        # A full-scale square wave overshoots when filtered; the overshoot
+        # must saturate instead of wrapping to the opposite sign
+        square = np.where((np.arange(800) // 40) % 2 == 0, 32767, -32768).astype(np.int16)
+        upsampled = resample_audio(square, 8000, 16000)
+        assert upsampled.max() == 32767
+        assert np.all(upsampled[np.repeat(square, 2) > 0] > -16384)
+        
+    def test_same_rate_resampling(self, rng):
         """Test resampling with same rate"""
-        original = np.random.randn(8000).astype(np.int16)
+        original = rng.standard_normal(8000, dtype=np.float32).astype(np.int16)
         resampled = resample_audio(original, 8000, 8000)
         
         # Should return unchanged
         assert np.array_equal(resampled, original)
+
+    def test_normalize_full_scale_negative_peak(self):
+        """Test normalization finds a -32768 peak"""
+        audio = np.array([-32768, 100, 0], dtype=np.int16)
+        normalized = normalize_audio(audio, target_level=0.8)
+        
+        assert normalized.dtype == np.int16
+        assert normalized.tolist() == [-26213, 79, 0]
+
+    def test_chunk_audio(self):
+        """Test PCM is split into fixed-size chunks with a short tail"""
+        audio = bytes(range(256)) * 3  # 384 samples of 16-bit PCM
+        chunks = chunk_audio(audio, 10, 16000)  # 160 samples per chunk
+        
+        assert [len(c) for c in chunks] == [320, 320, 128]
+        assert b''.join(chunks) == audio
+
+class TestTranscriptionBatcher:
+    """Test micro-batching of concurrent transcriptions"""
+    
+    async def test_concurrent_requests_share_a_batch(self):
+        """Test requests queued together are processed as one batch"""
+        from concurrent.futures import ThreadPoolExecutor
+        from app.audio._whisper_batch import TranscriptionBatcher
+        
+        batch_sizes = []
+        
+        def process_batch(audios):
+            batch_sizes.append(len(audios))
+            return [f"clip {len(audio)}" for audio in audios]
+            
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            batcher = TranscriptionBatcher(process_batch, executor, max_batch_size=8)
+            clips = [np.zeros(1600 + i, dtype=np.float32) for i in range(4)]
+            
+            results = await asyncio.gather(*[batcher.submit(clip) for clip in clips])
+            await batcher.close()
+            
+        # Each caller gets its own transcript back
+        assert results == [f"clip {1600 + i}" for i in range(4)]
+        assert batch_sizes == [4]
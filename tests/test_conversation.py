@@ -2,10 +2,11 @@
 Test conversation flow and management
 """
 import pytest
-import time
+import numpy as np
 from app.conversation.turn_manager import TurnManager
 from app.conversation.state_machine import ConversationStateMachine, ConversationState
 from app.llm.context_manager import ContextManager
+from app.llm.semantic_cache import SemanticCache
 
 class TestTurnManager:
     """Test turn management"""
@@ -28,11 +29,12 @@ class TestTurnManager:
         
     def test_interruption_detection(self):
         """Test interruption detection"""
-        manager = TurnManager()
+        now = [100.0]
+        manager = TurnManager(clock=lambda: now[0])
         
         # Start speech
         manager.start_speech()
-        time.sleep(0.2)  # Wait past threshold
+        now[0] += 0.2  # Past threshold
         
         # Should detect interruption
         assert manager.is_interruption(assistant_speaking=True)
@@ -75,13 +77,14 @@ class TestStateMachine:
         
     def test_state_duration(self):
         """Test state duration tracking"""
-        sm = ConversationStateMachine("test_call")
+        now = [100.0]
+        sm = ConversationStateMachine("test_call", clock=lambda: now[0])
         sm.transition_to(ConversationState.LISTENING)
         
-        time.sleep(0.1)
+        now[0] += 0.1
         duration = sm.get_state_duration()
         
-        assert duration >= 0.1
+        assert duration == pytest.approx(0.1)
 
 class TestContextManager:
     """Test context management"""
@@ -120,6 +123,23 @@ class TestContextManager:
         # Should only keep max_history_turns
         assert len(context['history']) == manager.max_history_turns
         
+    def test_history_text(self):
+        """Test history text matches the retained turns"""
+        manager = ContextManager()
+        
+        for i in range(12):
+            manager.add_turn("test_call", f"User {i}", f"Assistant {i}")
+            
+        text = manager.get_history_text("test_call")
+        assert text.startswith("User: User 2\nAssistant: Assistant 2")
+        assert text.endswith("User: User 11\nAssistant: Assistant 11")
+        
+        assert manager.get_history_text("test_call", max_turns=1) == "User: User 11\nAssistant: Assistant 11"
+        
+        # Cached text is refreshed after a new turn
+        manager.add_turn("test_call", "Bye", "Goodbye!")
+        assert manager.get_history_text("test_call").endswith("User: Bye\nAssistant: Goodbye!")
+        
     def test_metadata(self):
         """Test metadata management"""
         manager = ContextManager()
@@ -131,3 +151,34 @@ class TestContextManager:
         
         assert context['metadata']['language'] == "en"
         assert context['metadata']['sentiment'] == "positive"
+
+class TestSemanticCache:
+    """Test the response cache"""
+    
+    def test_exact_match(self):
+        """Test normalized utterances match only after the same turn"""
+        cache = SemanticCache(capacity=4)
+        cache.put("Hello there!", "", "Hi, how can I help?")
+        
+        assert cache.get("hello  there", "") == "Hi, how can I help?"
+        assert cache.get("hello there", "Anything else?") is None
+        
+    def test_similar_match(self):
+        """Test nearest-neighbour lookup respects threshold and context"""
+        cache = SemanticCache(capacity=4, threshold=0.9)
+        cache.put("what are your opening hours", "", "Nine to five.", np.array([1.0, 0.0, 0.0]))
+        
+        assert cache.get_similar(np.array([0.95, 0.1, 0.0]), "") == "Nine to five."
+        assert cache.get_similar(np.array([0.5, 0.5, 0.5]), "") is None
+        assert cache.get_similar(np.array([1.0, 0.0, 0.0]), "Goodbye!") is None
+        
+    def test_capacity(self):
+        """Test old entries are evicted"""
+        cache = SemanticCache(capacity=2)
+        for i in range(3):
+            cache.put(f"question {i}", "", f"answer {i}", np.eye(3)[i])
+            
+        assert cache.get("question 0", "") is None
+        assert cache.get_similar(np.eye(3)[0], "") is None
+        assert cache.get_similar(np.eye(3)[2], "") == "answer 2"
+
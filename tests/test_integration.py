@@ -47,6 +47,43 @@ class TestWebSocketHandler:
         assert handler.stream_sid == "MZ789012"
         mock_metrics.record_call_start.assert_called_with("CA123456")
 
+    async def test_stop_ends_all_workers(self):
+        """Test a stop event ends the reader, pipeline and writer together"""
+        messages = [
+            {"event": "start", "start": {"callSid": "CA654321", "streamSid": "MZ210987"}},
+            {"event": "stop"}
+        ]
+        mock_ws = AsyncMock()
+        mock_ws.receive_text = AsyncMock(side_effect=[json.dumps(m) for m in messages])
+        
+        handler = TwilioWebSocketHandler(mock_ws, Mock())
+        call_sid = await asyncio.wait_for(handler.handle_connection(), timeout=5)
+        
+        assert call_sid == "CA654321"
+        assert not handler.is_connected
+        assert not handler.audio_processor.is_processing
+        
+    async def test_outbound_audio_is_coalesced(self):
+        """Test queued audio is merged into one frame and marks keep order"""
+        mock_ws = AsyncMock()
+        handler = TwilioWebSocketHandler(mock_ws, Mock())
+        handler.stream_sid = "MZ789012"
+        
+        for payload in (b'\x01', b'\x02', b'\x03'):
+            await handler.send_audio(payload)
+        await handler.send_mark("end")
+        await handler.send_audio(b'\x04')
+        
+        writer = asyncio.create_task(handler._write_outbound())
+        await handler._outbound.join()
+        writer.cancel()
+        
+        sent = [json.loads(call.args[0]) for call in mock_ws.send_text.call_args_list]
+        assert [m['event'] for m in sent] == ["media", "mark", "media"]
+        assert sent[0]['media']['payload'] == "AQID"
+        assert sent[1]['mark']['name'] == "end"
+        assert sent[2]['media']['payload'] == "BA=="
+
 @pytest.mark.asyncio
 class TestAudioPipeline:
     """Test audio processing pipeline"""
@@ -79,6 +116,133 @@ class TestAudioPipeline:
         assert response is not None
         assert len(response) > 0
         
+    async def test_stream_splits_sentences(self):
+        """Test streamed tokens are yielded per sentence and stored whole"""
+        generator = ResponseGenerator()
+        
+        async def tokens(prompt):
+            for token in ["Sure", " thing", ". He is in", ".", " See you", " then!", " Bye"]:
+                yield token
+        
+        generator.ollama.generate_stream = tokens
+        sentences = [s async for s in generator.generate_stream("Hi", "stream_call")]
+        
+        assert sentences == ["Sure thing.", "He is in.", "See you then!", "Bye."]
+        context = generator.context_manager.get_context("stream_call")
+        assert context['history'][-1]['assistant'] == "Sure thing. He is in. See you then! Bye"
+        
+    async def test_prompt_keeps_recent_turns(self):
+        """Test the prompt includes only the most recent turns"""
+        generator = ResponseGenerator()
+        
+        for i in range(8):
+            generator.context_manager.add_turn("prompt_call", f"Question {i}", f"Answer {i}")
+            
+        context = generator.context_manager.get_context("prompt_call")
+        prompt = generator._build_prompt("Next", context)
+        
+        assert "Question 2" not in prompt
+        assert prompt.endswith("User: Question 7\nAssistant: Answer 7\n\nUser: Next\nAssistant:")
+        
+    async def test_repeated_utterance_is_cached_per_call(self):
+        """Test cached answers are reused within a call but never across calls"""
+        from app.llm.semantic_cache import get_response_cache
+        
+        generator = ResponseGenerator()
+        generator.response_cache = get_response_cache()
+        generator.response_cache.clear()
+        generator.ollama.generate = AsyncMock(return_value="We open at nine.")
+        
+        await generator.generate("Opening hours?", "cache_call_1")
+        
+        # Another caller asking the same thing still goes to the LLM
+        await generator.generate("opening hours", "cache_call_2")
+        assert generator.ollama.generate.await_count == 2
+        
+        # The same caller repeating it after the same assistant turn does not
+        await generator.generate("Opening hours?", "cache_call_2")
+        response = await generator.generate("opening hours!", "cache_call_2")
+        
+        assert response == "We open at nine."
+        assert generator.ollama.generate.await_count == 3
+        
+    async def test_embedding_does_not_delay_generation(self, monkeypatch):
+        """Test a cache miss answers without waiting for the embedding"""
+        import app.llm.response_generator as response_generator
+        from app.llm.semantic_cache import get_response_cache
+        monkeypatch.setattr(response_generator, "_embed_retry_at", 0.0)
+        
+        generator = ResponseGenerator()
+        generator.response_cache = get_response_cache()
+        generator.response_cache.clear()
+        generator.ollama.generate = AsyncMock(return_value="Sure, for how many?")
+        
+        release = asyncio.Event()
+        async def slow_embed(text):
+            await release.wait()
+            return [1.0, 0.0]
+        generator.ollama.embed = slow_embed
+        
+        response = await asyncio.wait_for(
+            generator.generate("Can I book a table", "embed_call"), timeout=1
+        )
+        assert response == "Sure, for how many?"
+        
+        # The embedding is stored once it arrives
+        release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        cache_key = generator._cache_key("embed_call", {"history": []})
+        assert generator.response_cache.get_similar([1.0, 0.0], cache_key) == "Sure, for how many?"
+        
+    async def test_empty_answer_cancels_embedding(self, monkeypatch):
+        """Test a pending embedding is cancelled when nothing will be cached"""
+        import app.llm.response_generator as response_generator
+        from app.llm.semantic_cache import get_response_cache
+        monkeypatch.setattr(response_generator, "_embed_retry_at", 0.0)
+        
+        generator = ResponseGenerator()
+        generator.response_cache = get_response_cache()
+        generator.response_cache.clear()
+        generator.ollama.generate = AsyncMock(return_value="")
+        
+        cancelled = asyncio.Event()
+        async def slow_embed(text):
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        generator.ollama.embed = slow_embed
+        
+        response = await generator.generate("Can I book a table", "empty_call")
+        assert "repeat" in response
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        
+    async def test_stream_uses_semantic_hit(self, monkeypatch):
+        """Test a semantic hit arriving before the first sentence replaces the stream"""
+        import app.llm.response_generator as response_generator
+        from app.llm.semantic_cache import get_response_cache
+        monkeypatch.setattr(response_generator, "_embed_retry_at", 0.0)
+        
+        generator = ResponseGenerator()
+        generator.response_cache = get_response_cache()
+        generator.response_cache.clear()
+        cache_key = generator._cache_key("semantic_call", {"history": []})
+        generator.response_cache.put("when do you open", cache_key, "We open at nine.", [1.0, 0.0])
+        
+        generator.ollama.embed = AsyncMock(return_value=[1.0, 0.0])
+        
+        async def tokens(prompt):
+            for token in ["Our", " hours", " are", " nine", " to", " five."]:
+                await asyncio.sleep(0)
+                yield token
+        generator.ollama.generate_stream = tokens
+        
+        sentences = [s async for s in generator.generate_stream("what time do you open", "semantic_call")]
+        
+        assert sentences == ["We open at nine."]
+        
 @pytest.mark.asyncio
 class TestEndToEnd:
     """End-to-end integration tests"""
@@ -102,14 +266,25 @@ class TestEndToEnd:
         assert connected
         
     @pytest.mark.skip(reason="Requires models installed")
-    async def test_whisper_initialization(self):
+    async def test_whisper_initialization(self, whisper):
         """Test Whisper model initialization"""
-        from app.audio.whisper_turbo import WhisperTurbo
-        
-        whisper = WhisperTurbo()
         await whisper.initialize()
         assert whisper.is_ready()
 
+def test_twiml_webhook():
+    """Test the TwiML webhook serves XML pointing at the media stream"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    
+    client = TestClient(app)
+    first = client.post("/twiml")
+    second = client.post("/twiml")
+    
+    assert first.headers["content-type"] == "application/xml"
+    assert first.text.startswith("<?xml")
+    assert "/media-stream" in first.text
+    assert first.content == second.content
+
 def test_imports():
     """Test that all modules can be imported"""
     try: